@@ -0,0 +1,74 @@
+"""
+Run one LLM analysis over many matches with few calls
+
+Jobs are packed several per prompt and the model answers with one JSON
+object keyed by job id; the batches themselves run concurrently under
+config.LLM_MAX_CONCURRENCY, so the whole top-N costs about one call.
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+import config
+from utils.llm import call_llm
+
+
+def _parse_json_object(text: str) -> dict:
+    """Pull the outermost JSON object out of a model response (code fences and chatter allowed)"""
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        raise ValueError("no JSON object in response")
+    return json.loads(text[start:end + 1])
+
+
+def format_jobs(jobs, desc_chars=1200) -> str:
+    """Jobs block for a batched prompt, each tagged with its job_id"""
+    blocks = []
+    for job in jobs:
+        blocks.append(
+            f"[{job.job_id}] {job.title} at {job.company}\n"
+            f"{(job.description or '')[:desc_chars]}"
+        )
+    return "\n\n".join(blocks)
+
+
+def analyse_batched(
+    jobs: List,
+    build_prompt: Callable[[List], str],
+    tokens_per_job: int,
+    batch_size: int = None,
+    max_workers: int = None,
+) -> Dict[str, str]:
+    """
+    Args:
+        jobs: Jobs to analyse
+        build_prompt: Builds the prompt for one batch of jobs; it must ask for
+            a JSON object mapping each job_id to a string
+        tokens_per_job: Completion budget per job in a batch
+        batch_size: Jobs per LLM call (defaults to config.LLM_BATCH_SIZE)
+        max_workers: Concurrent LLM calls (defaults to config.LLM_MAX_CONCURRENCY)
+
+    Returns:
+        {job_id: text} for every job the model answered for
+    """
+    if not jobs:
+        return {}
+    batch_size = max(1, batch_size or config.LLM_BATCH_SIZE)
+    max_workers = max(1, max_workers or config.LLM_MAX_CONCURRENCY)
+    batches = [jobs[i:i + batch_size] for i in range(0, len(jobs), batch_size)]
+
+    def run(batch):
+        response = call_llm(build_prompt(batch), max_tokens=tokens_per_job * len(batch))
+        try:
+            parsed = _parse_json_object(response)
+        except Exception as e:
+            print(f"Batched analysis parsing error: {e}")
+            return {}
+        ids = {j.job_id for j in batch}
+        return {str(k): str(v) for k, v in parsed.items() if str(k) in ids}
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as pool:
+        for answer in pool.map(run, batches):
+            results.update(answer)
+    return results
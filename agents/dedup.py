@@ -0,0 +1,172 @@
+"""
+Near-duplicate postings across sources
+
+The same role is often cross-posted on several boards with small edits.
+Each posting gets a MinHash signature over word 3-gram shingles of its
+normalized title, company and description. LSH banding then finds
+candidate duplicates without comparing all pairs. A candidate counts as a
+duplicate when the signatures agree on at least DEDUP_THRESHOLD of their
+hashes (the estimated Jaccard similarity) and the titles share at least
+DEDUP_TITLE_MIN of their words, so different roles with the same company
+boilerplate stay apart.
+
+dedup_jobs() keeps one canonical posting per cluster, the one with the
+longest description, and records every board it appeared on in
+Job.sources. NearDuplicateIndex does the same incrementally, for
+streaming.
+"""
+import html
+import re
+
+import numpy as np
+
+import config
+
+NUM_PERM = 128
+BANDS = 32  # 32 bands x 4 rows: pairs at 0.7 similarity collide with probability ~1.0, at 0.4 ~0.58
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 3
+MAX_WORDS = 400  # cross-posts differ most in trailing boilerplate
+
+# Multiply-shift hashing: h_i(x) = (a_i * x + b_i) mod 2^64 >> 32, a_i odd
+_rng = np.random.RandomState(1)
+_A = _rng.randint(0, 1 << 63, size=NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_B = _rng.randint(0, 1 << 63, size=NUM_PERM, dtype=np.uint64)
+_SHIFT = np.uint64(32)
+_P1 = np.uint64(1000003)
+_P2 = np.uint64(1000003 ** 2)
+
+_WORD_RE = re.compile(r"\w+")
+_TAG_RE = re.compile(r"<[^>]*>")
+
+
+def _words(text):
+    return _WORD_RE.findall(text.casefold())
+
+
+def _shingles(job):
+    """Hashes of the word 3-grams of title, company and description"""
+    words = _words(f"{job.title} {job.company}")
+    # A regex tag strip is plenty for shingling and far cheaper than parsing
+    description = html.unescape(_TAG_RE.sub(" ", (job.description or "")[:MAX_WORDS * 20]))
+    words += _words(description)[:MAX_WORDS]
+    if not words:
+        words = [job.job_id]
+    # str hashes are salted per process, which is fine: signatures are never stored
+    h = np.fromiter(map(hash, words), dtype=np.int64, count=len(words)).view(np.uint64)
+    if len(h) >= SHINGLE_WORDS:
+        h = h[:-2] * _P2 + h[1:-1] * _P1 + h[2:]
+    return np.unique(h)
+
+
+def signatures(jobs):
+    """MinHash signatures, shape (len(jobs), NUM_PERM) uint32"""
+    shingles = [_shingles(j) for j in jobs]
+    if not shingles:
+        return np.empty((0, NUM_PERM), dtype=np.uint32)
+    flat = np.concatenate(shingles)
+    starts = np.cumsum([0] + [len(s) for s in shingles[:-1]])
+
+    sigs = np.empty((len(jobs), NUM_PERM), dtype=np.uint32)
+    step = 16  # permutations per pass keeps the (step, shingles) temporary small
+    for p in range(0, NUM_PERM, step):
+        hashed = (_A[p:p + step, None] * flat[None, :] + _B[p:p + step, None]) >> _SHIFT
+        sigs[:, p:p + step] = np.minimum.reduceat(hashed, starts, axis=1).T
+    return sigs
+
+
+def _title_overlap(a, b):
+    wa, wb = set(_words(a)), set(_words(b))
+    if not wa or not wb:
+        return 1.0
+    return len(wa & wb) / len(wa | wb)
+
+
+class NearDuplicateIndex:
+    """
+    LSH index over every job added so far
+
+    add() returns, for each new job, the first-seen job of the cluster it
+    duplicates, or None when it is new.
+    """
+
+    def __init__(self, threshold=None, title_min=None):
+        self.threshold = config.DEDUP_THRESHOLD if threshold is None else threshold
+        self.title_min = config.DEDUP_TITLE_MIN if title_min is None else title_min
+        self._buckets = [{} for _ in range(BANDS)]
+        self._jobs = []
+        self._sigs = []
+        self._root = []
+
+    def add(self, jobs):
+        jobs = list(jobs)
+        sigs = signatures(jobs)
+        dup_of = []
+        for job, sig in zip(jobs, sigs):
+            i = len(self._jobs)
+            keys = [sig[b * ROWS:(b + 1) * ROWS].tobytes() for b in range(BANDS)]
+            root = None
+            tried = set()
+            for band, key in zip(self._buckets, keys):
+                j = band.get(key)
+                if j is None or j in tried:
+                    continue
+                tried.add(j)
+                if (
+                    np.count_nonzero(self._sigs[j] == sig) >= self.threshold * NUM_PERM
+                    and _title_overlap(job.title, self._jobs[j].title) >= self.title_min
+                ):
+                    root = self._root[j]
+                    break
+
+            self._jobs.append(job)
+            self._sigs.append(sig)
+            self._root.append(i if root is None else root)
+            for band, key in zip(self._buckets, keys):
+                band.setdefault(key, i)
+            dup_of.append(None if root is None else self._jobs[root])
+        return dup_of
+
+    def __len__(self):
+        return len(self._jobs)
+
+
+def merge_sources(target, *others):
+    """Record the boards of others on target (in place)"""
+    merged = list(target.sources or [target.source])
+    for job in others:
+        for source in job.sources or [job.source]:
+            if source not in merged:
+                merged.append(source)
+    target.sources = merged
+    return target
+
+
+def dedup_jobs(jobs, threshold=None):
+    """
+    Collapse near-duplicate postings
+
+    Args:
+        jobs: List of Job objects, possibly from several sources
+        threshold: Minimum estimated Jaccard similarity (default config.DEDUP_THRESHOLD)
+
+    Returns:
+        One job per cluster in first-seen order: the member with the longest
+        description, with Job.sources listing every member's source
+    """
+    jobs = list(jobs)
+    if len(jobs) < 2:
+        return jobs
+
+    clusters = {}
+    for job, root in zip(jobs, NearDuplicateIndex(threshold).add(jobs)):
+        clusters.setdefault(id(job if root is None else root), []).append(job)
+
+    out = []
+    for members in clusters.values():
+        if len(members) == 1:
+            out.append(members[0])
+            continue
+        best = max(members, key=lambda j: len(j.description or ""))
+        out.append(merge_sources(best.model_copy(), *[j for j in members if j is not best]))
+    return out
@@ -1,28 +1,144 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, zip_longest
+from urllib.parse import urlparse
+
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from requests.compat import chardet
+
+import config
+from storage.cache import description_cache
+from utils.html_text import page_text, visible_text
+from utils.parse_pool import run_parse
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (AutoJobScout/1.0)"
 }
 
-def fetch_job_description(url, timeout=20, max_chars=6000):
+def fetch_job_description(url, timeout=20, max_chars=6000, session=None, max_bytes=None):
+    """
+    Visible text of a job page, at most max_chars characters
+
+    The page is streamed and parsed a chunk at a time: script, style and
+    noscript content is skipped as it arrives, and reading stops once
+    max_chars of text are collected or max_bytes (default
+    config.ENRICH_MAX_BYTES) have been downloaded. With PARSE_WORKERS set,
+    large pages are parsed in a worker process instead.
+    """
+    http = session or requests
+    max_bytes = max_bytes or config.ENRICH_MAX_BYTES
     try:
-        r = requests.get(url, headers=HEADERS, timeout=timeout)
-        r.raise_for_status()
+        r = http.get(url, headers=HEADERS, timeout=timeout, stream=True)
     except Exception:
         return ""
 
-    soup = BeautifulSoup(r.text, "html.parser")
+    with r:
+        try:
+            r.raise_for_status()
+            chunks = _capped_chunks(r, max_bytes)
+            encoding = r.encoding
+            if not encoding:
+                # No charset in the headers: sniff the first chunk, as response.text would
+                first = next(chunks, b"")
+                encoding = chardet.detect(first)["encoding"]
+                if not encoding or encoding.lower() == "ascii":
+                    encoding = "utf-8"  # an all-ASCII head says nothing about the rest
+                chunks = chain([first], chunks)
+            if config.PARSE_WORKERS > 0:
+                # Parse in a worker process; the page is read whole (up to max_bytes) first
+                return run_parse(page_text, b"".join(chunks), max_chars, encoding)
+            return visible_text(chunks, max_chars=max_chars, encoding=encoding)
+        except Exception:
+            return ""
+
+
+def _capped_chunks(response, max_bytes, chunk_size=16384):
+    read = 0
+    for chunk in response.iter_content(chunk_size):
+        yield chunk
+        read += len(chunk)
+        if read >= max_bytes:
+            return
+
+
+def _needs_description(job, min_chars):
+    return not job.description or len(job.description) < min_chars
+
+
+def _host(url):
+    return urlparse(url).netloc.lower()
+
+
+def _interleave_by_host(jobs):
+    """Round-robin jobs across hosts so workers don't all queue on one board."""
+    by_host = {}
+    for j in jobs:
+        by_host.setdefault(_host(j.url), []).append(j)
+    return [j for group in zip_longest(*by_host.values()) for j in group if j is not None]
+
+
+def _make_session(pool_size):
+    """Keep-alive session whose connection pool is sized for the worker count."""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def enrich_descriptions(jobs, min_chars=200, workers=None, per_host=None, timeout=None):
+    """
+    Fetch full descriptions concurrently for jobs whose description is short
+
+    Args:
+        jobs: List of Job objects (updated in place)
+        min_chars: Descriptions at least this long are left alone
+        workers: Total concurrent fetches (defaults to config.ENRICH_WORKERS)
+        per_host: Concurrent fetches against one host (defaults to config.ENRICH_PER_HOST)
+        timeout: Per-request timeout in seconds (defaults to config.FETCH_TIMEOUT)
+
+    Returns:
+        The same list of Job objects
+    """
+    todo = [j for j in jobs if j.url and _needs_description(j, min_chars)]
+
+    cache = description_cache()
+    if cache is not None and todo:
+        cached = cache.get_many(j.url for j in todo)
+        for j in todo:
+            if j.url in cached:
+                j.description = cached[j.url]
+        todo = [j for j in todo if j.url not in cached]
+
+    if not todo:
+        return jobs
+
+    workers = max(1, workers or config.ENRICH_WORKERS)
+    per_host = max(1, per_host or config.ENRICH_PER_HOST)
+    timeout = timeout or config.FETCH_TIMEOUT
+
+    todo = _interleave_by_host(todo)
+    host_slots = {h: threading.BoundedSemaphore(per_host) for h in {_host(j.url) for j in todo}}
 
-    # Remove scripts/styles
-    for tag in soup(["script", "style", "noscript"]):
-        tag.decompose()
+    def work(job):
+        try:
+            with host_slots[_host(job.url)]:
+                return fetch_job_description(job.url, timeout=timeout, session=session)
+        except Exception as e:
+            print(f"Failed to enrich job {job.job_id}: {e}")
+            return ""
 
-    text = soup.get_text(separator=" ")
-    text = " ".join(text.split())
+    fetched = {}
+    with _make_session(workers) as session, ThreadPoolExecutor(max_workers=min(workers, len(todo))) as pool:
+        for job, desc in zip(todo, pool.map(work, todo)):
+            if desc:
+                job.description = desc
+                fetched[job.url] = desc
 
-    # Heuristic: job pages are long; keep middle chunk
-    if len(text) > max_chars:
-        text = text[:max_chars]
+    # Failed fetches are not cached so they get retried next run
+    if cache is not None:
+        cache.set_many(fetched)
 
-    return text
+    return jobs
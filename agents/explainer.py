@@ -1,4 +1,5 @@
 from utils.llm import call_llm
+from agents.batching import analyse_batched, format_jobs
 
 def explain(job, resume):
     if isinstance(job, (list, tuple)):
@@ -14,4 +15,22 @@ Job:
 
 Explain fit and missing skills in 3-4 sentences.
 """
-    return call_llm(prompt, max_tokens=500)
\ No newline at end of file
+    return call_llm(prompt, max_tokens=500)
+
+
+def explain_batch(jobs, resume):
+    """Explanations for many jobs, several per LLM call -> {job_id: text}"""
+    def build_prompt(batch):
+        return f"""
+Resume:
+{resume[:3000]}
+
+Jobs (each starts with its [job_id]):
+{format_jobs(batch)}
+
+For EACH job, explain fit and missing skills in 3-4 sentences.
+Return ONLY a JSON object mapping each job_id to its explanation string.
+
+JSON output:
+"""
+    return analyse_batched(jobs, build_prompt, tokens_per_job=250)
@@ -1,4 +1,5 @@
 from utils.llm import call_llm
+from agents.batching import analyse_batched, format_jobs
 
 def gap_analysis(job, resume):
     prompt = f"""
@@ -13,4 +14,25 @@ List:
 2. Suggested resume improvements
 Keep it concise.
 """
-    return call_llm(prompt, max_tokens=800)
\ No newline at end of file
+    return call_llm(prompt, max_tokens=800)
+
+
+def gap_analysis_batch(jobs, resume):
+    """Gap analyses for many jobs, several per LLM call -> {job_id: text}"""
+    def build_prompt(batch):
+        return f"""
+Resume:
+{resume[:3000]}
+
+Jobs (each starts with its [job_id]):
+{format_jobs(batch, desc_chars=800)}
+
+For EACH job, list:
+1. Missing skills
+2. Suggested resume improvements
+Keep it concise.
+Return ONLY a JSON object mapping each job_id to its analysis as one string.
+
+JSON output:
+"""
+    return analyse_batched(jobs, build_prompt, tokens_per_job=300)
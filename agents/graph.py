@@ -1,17 +1,23 @@
-from langgraph.graph import StateGraph
+import threading
+
 from agents.state import AgentState
 from agents.planner_agent import planner_agent
 from agents.match_agent import match_agent
 from agents.tools import ingest_jobs, enrich_jobs
-from agents.explainer import explain
+from agents.dedup import dedup_jobs
+from agents.stream import stream_node
+from agents.explainer import explain, explain_batch
 from agents.critic import critique
+from storage.job_store import get_job_store
+import config
 
 # If you have a gap analysis function somewhere, keep this import.
 # If you don't, comment it out or delete it.
 try:
-    from agents.gap_agent import gap_analysis  # optional
+    from agents.gap_agent import gap_analysis, gap_analysis_batch  # optional
 except Exception:
     gap_analysis = None
+    gap_analysis_batch = None
 
 
 def ingest_node(state: AgentState) -> AgentState:
@@ -19,8 +25,28 @@ def ingest_node(state: AgentState) -> AgentState:
     if state.agent_log is None:
         state.agent_log = []
 
+    store = get_job_store()
+    if state.offline:
+        if store is None:
+            state.agent_log.append("Ingest: offline mode needs the job store (USE_JOB_STORE=true)")
+            state.jobs = []
+            return state
+        state.jobs = store.load(state.use_sources, max_age=config.OFFLINE_MAX_AGE_DAYS * 86400)
+        state.changed_job_ids = []
+        state.agent_log.append(f"Ingest: loaded {len(state.jobs)} stored jobs for {state.use_sources} (offline)")
+        return state
+
     state.agent_log.append(f"Ingest: fetching jobs from {state.use_sources}")
     state.jobs = ingest_jobs(state.use_sources)
+    if config.DEDUP_NEAR:
+        fetched = len(state.jobs)
+        state.jobs = dedup_jobs(state.jobs)
+        state.agent_log.append(f"Ingest: collapsed {fetched - len(state.jobs)} cross-posted near-duplicates")
+
+    if store is not None:
+        state.jobs, changed = store.sync(state.jobs)
+        state.changed_job_ids = sorted(changed)
+        state.agent_log.append(f"Ingest: {len(changed)} of {len(state.jobs)} jobs are new or changed")
     return state
 
 
@@ -28,79 +54,139 @@ def enrich_node(state: AgentState) -> AgentState:
     if state.agent_log is None:
         state.agent_log = []
 
-    if state.fetch_descriptions:
-        state.agent_log.append("Enrich: fetching full job descriptions")
-        state.jobs = enrich_jobs(state.jobs)
+    if state.fetch_descriptions and state.offline:
+        state.agent_log.append("Enrich: skipped (offline)")
+    elif state.fetch_descriptions:
+        if state.changed_job_ids is None:
+            state.agent_log.append("Enrich: fetching full job descriptions")
+            state.jobs = enrich_jobs(state.jobs)
+        else:
+            # Unchanged postings already carry their stored descriptions
+            changed = set(state.changed_job_ids)
+            to_enrich = [j for j in state.jobs if j.job_id in changed]
+            state.agent_log.append(f"Enrich: fetching full descriptions for {len(to_enrich)} new/changed jobs")
+            enrich_jobs(to_enrich)
+
+        store = get_job_store()
+        if store is not None:
+            store.save_descriptions(state.jobs)
     else:
         state.agent_log.append("Enrich: skipped")
     return state
 
 
-def explain_node(state: AgentState) -> AgentState:
-    if state.agent_log is None:
-        state.agent_log = []
+# gap and explain run as parallel branches after match, so they return only
+# the keys they change; AgentState.agent_log's reducer merges their log lines.
 
+def explain_node(state: AgentState) -> dict:
     if not state.matches:
-        state.explanation = "No matches to explain."
-        return state
+        return {"explanation": "No matches to explain."}
 
     job, score = state.matches[0]
-    state.explanation = explain(job, state.resume_text)
-    state.agent_log.append(f"Explainer: explained top match (score={score:.3f})")
-    return state
-
-
-def critic_node(state: AgentState) -> AgentState:
-    if state.agent_log is None:
-        state.agent_log = []
-
+    top_n = min(config.MATCH_ANALYSIS_TOP_N, len(state.matches))
+    if top_n <= 1:
+        return {
+            "explanation": explain(job, state.resume_text),
+            "agent_log": [f"Explainer: explained top match (score={score:.3f})"],
+        }
+
+    explanations = explain_batch([j for j, _ in state.matches[:top_n]], state.resume_text)
+    return {
+        "explanation": explanations.get(job.job_id) or explain(job, state.resume_text),
+        "match_explanations": explanations,
+        "agent_log": [f"Explainer: explained {len(explanations)} of top {top_n} matches (top score={score:.3f})"],
+    }
+
+
+def critic_node(state: AgentState) -> dict:
     if not state.explanation:
-        state.critique = "No explanation produced."
-        return state
+        return {"critique": "No explanation produced."}
 
-    state.agent_log.append("Critic: checking explanation for hallucinations")
-    state.critique = critique(state.explanation)
-    return state
+    return {
+        "critique": critique(state.explanation),
+        "agent_log": ["Critic: checking explanation for hallucinations"],
+    }
 
 
-def gap_node(state: AgentState) -> AgentState:
+def gap_node(state: AgentState) -> dict:
     # Optional: only run if you actually have gap_analysis implemented.
-    if state.agent_log is None:
-        state.agent_log = []
-
     if not getattr(state, "run_gap_analysis", False):
-        return state
+        return {}
 
     if not state.matches:
-        state.gap_analysis = "No matches available for gap analysis."
-        return state
+        return {"gap_analysis": "No matches available for gap analysis."}
 
     if gap_analysis is None:
-        state.gap_analysis = "Gap analysis not implemented (agents/gap.py missing)."
-        return state
+        return {"gap_analysis": "Gap analysis not implemented (agents/gap.py missing)."}
 
     job, _ = state.matches[0]
-    state.gap_analysis = gap_analysis(job, state.resume_text)
-    state.agent_log.append("GapAgent: analyzed missing skills")
-    return state
-
-
-graph = StateGraph(AgentState)
-
-graph.add_node("planner", planner_agent)
-graph.add_node("ingest", ingest_node)
-graph.add_node("enrich", enrich_node)
-graph.add_node("match", match_agent)
-graph.add_node("gap", gap_node)
-graph.add_node("explain", explain_node)
-graph.add_node("critic", critic_node)
-
-graph.set_entry_point("planner")
-graph.add_edge("planner", "ingest")
-graph.add_edge("ingest", "enrich")
-graph.add_edge("enrich", "match")
-graph.add_edge("match", "gap")
-graph.add_edge("gap", "explain")
-graph.add_edge("explain", "critic")
-
-job_graph = graph.compile()
+    top_n = min(config.MATCH_ANALYSIS_TOP_N, len(state.matches))
+    if top_n <= 1 or gap_analysis_batch is None:
+        return {
+            "gap_analysis": gap_analysis(job, state.resume_text),
+            "agent_log": ["GapAgent: analyzed missing skills"],
+        }
+
+    gaps = gap_analysis_batch([j for j, _ in state.matches[:top_n]], state.resume_text)
+    return {
+        "gap_analysis": gaps.get(job.job_id) or gap_analysis(job, state.resume_text),
+        "match_gaps": gaps,
+        "agent_log": [f"GapAgent: analyzed missing skills for {len(gaps)} of top {top_n} matches"],
+    }
+
+
+def route_after_planner(state: AgentState) -> str:
+    # Streaming needs the network; offline runs always use the staged path
+    return "stream" if state.streaming and not state.offline else "ingest"
+
+
+def build_graph():
+    # langgraph is imported here so importing this module stays cheap
+    from langgraph.graph import StateGraph, END
+
+    graph = StateGraph(AgentState)
+
+    graph.add_node("planner", planner_agent)
+    graph.add_node("ingest", ingest_node)
+    graph.add_node("enrich", enrich_node)
+    graph.add_node("match", match_agent)
+    graph.add_node("stream", stream_node)
+    graph.add_node("gap", gap_node)
+    graph.add_node("explain", explain_node)
+    graph.add_node("critic", critic_node)
+
+    graph.set_entry_point("planner")
+    graph.add_conditional_edges("planner", route_after_planner, {"stream": "stream", "ingest": "ingest"})
+    graph.add_edge("ingest", "enrich")
+    graph.add_edge("enrich", "match")
+
+    # Fan out: gap and explain only need the matches, so their LLM calls run
+    # concurrently; only the critic waits for the explanation.
+    for ranked in ("match", "stream"):
+        graph.add_edge(ranked, "gap")
+        graph.add_edge(ranked, "explain")
+    graph.add_edge("explain", "critic")
+    graph.add_edge("gap", END)
+    graph.add_edge("critic", END)
+
+    return graph.compile()
+
+
+_job_graph = None
+_job_graph_lock = threading.Lock()
+
+
+def get_job_graph():
+    """Compiled graph, built on first use"""
+    global _job_graph
+    with _job_graph_lock:
+        if _job_graph is None:
+            _job_graph = build_graph()
+        return _job_graph
+
+
+def __getattr__(name):
+    # Keeps `from agents.graph import job_graph` working, lazily
+    if name == "job_graph":
+        return get_job_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,10 +1,12 @@
-from rag.embeddings import embed
+from rag.embeddings import embed_jobs
 from rag.index import JobIndex
 from jobs.remoteok import fetch_jobs as fetch_remoteok
 from jobs.remotive import fetch_jobs as fetch_remotive
 from jobs.weworkremotely import fetch_jobs as fetch_wwr
 from jobs.newgrad_jobs import fetch_jobs as fetch_newgrad
-from agents.enrich import fetch_job_description
+from agents.enrich import enrich_descriptions
+from agents.dedup import dedup_jobs
+import config
 
 
 
@@ -33,18 +35,15 @@ def ingest(job_limit_per_source=150):
         seen.add(key)
         deduped.append(j)
 
-    enriched = []
-    for job in deduped:
-        if not job.description or len(job.description) < 200:
-            desc = fetch_job_description(job.url)
-            if desc:
-                job.description = desc
-        enriched.append(job)
+    # Then collapse the same posting cross-posted with small edits
+    if config.DEDUP_NEAR:
+        deduped = dedup_jobs(deduped)
+
+    enriched = enrich_descriptions(deduped, min_chars=200)
 
 
     # Build embeddings
-    texts = [(j.title + " " + j.company + " " + j.location + " " + j.description) for j in enriched]
-    vecs = embed(texts)
+    vecs = embed_jobs(enriched)
 
     idx = JobIndex()
     idx.add(vecs, deduped)
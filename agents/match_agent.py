@@ -1,5 +1,5 @@
 from agents.state import AgentState
-from rag.embeddings import embed
+from rag.embeddings import embed, embed_jobs, embedding_stats, text_prep_stats
 from rag.index import JobIndex
 
 
@@ -37,21 +37,28 @@ def match_agent(state: AgentState) -> AgentState:
 
     index = JobIndex()
 
-    texts = []
-    for j in state.jobs:
-        title = getattr(j, "title", "") or ""
-        company = getattr(j, "company", "") or ""
-        desc = getattr(j, "description", "") or ""
-        texts.append(f"{title} {company} {desc}")
-
-    vecs = embed(texts)
+    vecs = embed_jobs(state.jobs)
+    stats = embedding_stats()
+    prep = text_prep_stats()
     index.add(vecs, state.jobs)
 
     qvec = embed([state.resume_text])
-    raw = index.search(qvec, state.top_k)
+    raw = index.search(qvec, state.top_k, query_text=state.resume_text, filters=state.filters or None)
 
     state.matches = _normalize_matches(raw)
     state.agent_log.append(
-        f"Match: embedded {len(state.jobs)} jobs and ranked against resume (top_k={state.top_k})"
+        f"Match: embedded {len(state.jobs)} jobs and ranked against resume (top_k={state.top_k}, {index.mode} retrieval)"
     )
+    if state.filters:
+        state.agent_log.append(f"Match: filtered by {state.filters}, {len(state.matches)} matches")
+    if prep["chars_in"]:
+        state.agent_log.append(
+            f"Match: kept {prep['chars_kept'] / prep['chars_in']:.0%} of job text within the token budget "
+            f"({prep['chunks']} texts for {prep['jobs']} jobs)"
+        )
+    if stats:
+        state.agent_log.append(
+            f"Match: encoded {stats['texts']} uncached texts at {stats['texts_per_sec']:.0f} texts/sec "
+            f"(batch={stats['batch_size']}, workers={stats['workers']})"
+        )
     return state
@@ -2,4 +2,4 @@ from rag.embeddings import embed
 
 def match_jobs(index, resume_text, top_k=10):
     qvec = embed([resume_text])
-    return index.search(qvec, top_k)
+    return index.search(qvec, top_k, query_text=resume_text)
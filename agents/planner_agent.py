@@ -1,7 +1,20 @@
 from utils.llm import call_llm
 from pydantic import BaseModel, Field
 from typing import List
+import hashlib
 import json
+import config
+from storage.cache import plan_cache
+
+PLANNER_SOURCES = ["RemoteOK", "Remotive", "WeWorkRemotely", "NewGradJobs"]
+
+# Short descriptions the fast planner compares the intent against
+SOURCE_PROFILES = {
+    "RemoteOK": "Remote tech jobs at startups: software engineering, full stack, backend, frontend, devops, design, marketing",
+    "Remotive": "Remote jobs in software development, data science, machine learning, product, customer support, marketing, sales",
+    "WeWorkRemotely": "Remote programming, data science and analytics, devops and sysadmin jobs",
+    "NewGradJobs": "Entry-level new grad jobs, internships and junior software engineer roles for recent graduates",
+}
 
 class PlannerOutput(BaseModel):
     use_sources: List[str] = Field(description="Job sources to query")
@@ -30,7 +43,24 @@ def planner_agent(state):
         )
         return state
 
-    # Otherwise, use LLM to plan
+    if getattr(state, "planner_mode", "llm") == "fast":
+        return fast_planner(state)
+
+    # Otherwise, use LLM to plan (cached per resume + intent)
+    cache = plan_cache()
+    cache_key = _plan_cache_key(state)
+    cached = cache.get(cache_key) if cache is not None else None
+    if cached:
+        plan = PlannerOutput.model_validate_json(cached)
+        _apply_plan(state, plan)
+        state.agent_log.append(
+            f"Planner: cached AI plan - sources={plan.use_sources}, "
+            f"fetch_descriptions={plan.fetch_descriptions}, "
+            f"top_k={plan.top_k}, "
+            f"run_gap_analysis={plan.run_gap_analysis}"
+        )
+        return state
+
     prompt = f"""
 You are a planner agent for a job discovery system.
 
@@ -41,7 +71,7 @@ Given:
 - A job search intent
 
 Choose from the following job sources ONLY:
-RemoteOK, Remotive, WeWorkRemotely, NewGradJobs
+{", ".join(PLANNER_SOURCES)}
 
 Resume:
 {state.resume_text[:2000]}
@@ -70,6 +100,8 @@ JSON output:
         
         parsed = json.loads(json_str)
         plan = PlannerOutput(**parsed)
+        if cache is not None:
+            cache.set(cache_key, plan.model_dump_json())
     except Exception as e:
         print(f"Planner parsing error: {e}")
         # Fallback to defaults
@@ -80,15 +112,59 @@ JSON output:
             run_gap_analysis=True
         )
 
+    _apply_plan(state, plan)
+
+    state.agent_log.append(
+        f"Planner: AI decided - sources={plan.use_sources}, "
+        f"fetch_descriptions={plan.fetch_descriptions}, "
+        f"top_k={plan.top_k}, "
+        f"run_gap_analysis={plan.run_gap_analysis}"
+    )
+    return state
+
+
+def _apply_plan(state, plan: PlannerOutput):
     state.use_sources = plan.use_sources
     state.fetch_descriptions = plan.fetch_descriptions
     state.top_k = plan.top_k
     state.run_gap_analysis = plan.run_gap_analysis
 
+
+def _plan_cache_key(state) -> str:
+    payload = f"{config.LLM_MODEL}\0{config.OLLAMA_MODEL}\0{state.resume_text}\0{state.user_intent}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def fast_planner(state, max_sources=3, margin=0.1):
+    """
+    Deterministic, LLM-free plan: route to the sources whose profile is
+    most similar to the intent (2-3 of them, like the LLM planner), and use
+    the configured defaults for everything else.
+    """
+    from rag.embeddings import embed_cached
+
+    names = list(SOURCE_PROFILES)
+    vecs = embed_cached([state.user_intent or "relevant job opportunities"] + [SOURCE_PROFILES[n] for n in names])
+    sims = vecs[1:] @ vecs[0]
+    ranked = sorted(zip(names, sims), key=lambda x: -x[1])
+
+    best = ranked[0][1]
+    sources = [n for n, sim in ranked[:max_sources] if sim >= best - margin]
+    if len(sources) < 2:
+        sources = [n for n, _ in ranked[:2]]
+
+    plan = PlannerOutput(
+        use_sources=sources,
+        fetch_descriptions=config.DEFAULT_FETCH_DESCRIPTIONS,
+        top_k=config.DEFAULT_TOP_K,
+        run_gap_analysis=config.DEFAULT_RUN_GAP_ANALYSIS,
+    )
+    _apply_plan(state, plan)
     state.agent_log.append(
-        f"Planner: AI decided - sources={plan.use_sources}, "
+        f"Planner: fast plan - sources={plan.use_sources} "
+        f"(similarity {', '.join(f'{n}={s:.2f}' for n, s in ranked)}), "
         f"fetch_descriptions={plan.fetch_descriptions}, "
         f"top_k={plan.top_k}, "
         f"run_gap_analysis={plan.run_gap_analysis}"
     )
-    return state
\ No newline at end of file
+    return state
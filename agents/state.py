@@ -4,6 +4,17 @@ from pydantic import BaseModel
 def keep_first(a, b):
     return a if a else b
 
+def merge_log(a, b):
+    """
+    Nodes either return the whole state (whose log already starts with the
+    current one) or, in parallel branches, only their new log lines.
+    """
+    a = a or []
+    b = b or []
+    if b[:len(a)] == a:
+        return b
+    return a + b
+
 class AgentState(BaseModel):
     resume_text: Annotated[str, keep_first]
     user_intent: Annotated[str, keep_first]
@@ -12,15 +23,24 @@ class AgentState(BaseModel):
     fetch_descriptions: bool = True
     top_k: int = 10
     run_gap_analysis: bool = True
+    offline: bool = False
+    streaming: bool = False  # fetch/enrich/embed/score in micro-batches (agents/stream.py)
+    planner_mode: str = "llm"  # "llm" or "fast" (embedding-based, no LLM call)
+    filters: Dict[str, List[str]] = {}  # {facet: values} search filters (rag/facets.py)
 
     jobs: list = []
+    changed_job_ids: Optional[List[str]] = None
     matches: list = []
 
     explanation: Optional[str] = None
     critique: Optional[str] = None
     gap_analysis: Optional[str] = None
 
-    agent_log: List[str] = []
+    # Per-match analyses for the top matches, keyed by job_id
+    match_explanations: Dict[str, str] = {}
+    match_gaps: Dict[str, str] = {}
+
+    agent_log: Annotated[List[str], merge_log] = []
 
     agents: Dict[str, Dict[str, Any]] = {
         "state": {}
@@ -0,0 +1,151 @@
+"""
+Streaming fetch -> enrich -> embed -> score pipeline
+
+A producer thread pulls postings from the sources as each one finishes,
+enriches them in micro-batches and hands the batches over a bounded queue.
+The calling thread embeds and scores each batch as it arrives and keeps a
+running top-k heap, so CPU embedding overlaps network I/O instead of
+waiting for every source and page first.
+"""
+import heapq
+import itertools
+import queue
+import threading
+import time
+
+import numpy as np
+
+import config
+from agents.enrich import enrich_descriptions
+from agents.dedup import NearDuplicateIndex, merge_sources
+from agents.state import AgentState
+from agents.tools import iter_ingest
+from rag.embeddings import embed, embed_jobs
+from rag.facets import job_matches
+from rag.index import JobIndex
+from storage.job_store import get_job_store
+
+_DONE = object()
+
+
+def _put(out_q, item, stop):
+    """Blocking put that gives up once the consumer has stopped"""
+    while not stop.is_set():
+        try:
+            out_q.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce(state, out_q, stop, batch_size):
+    store = get_job_store()
+    near = NearDuplicateIndex() if config.DEDUP_NEAR else None
+    emitted = {}  # id(job given to near) -> the job streamed downstream
+    try:
+        for _, jobs in iter_ingest(state.use_sources):
+            fetched = jobs
+            if near is not None:
+                # Cross-posts of a job already streamed are dropped before enrichment;
+                # the first-seen posting stays canonical and gains their sources
+                fetched, merged = [], {}
+                for job, root in zip(jobs, near.add(jobs)):
+                    if root is None:
+                        fetched.append(job)
+                    elif id(root) in emitted:
+                        target = merge_sources(emitted[id(root)], job)
+                        merged[id(target)] = target
+                    else:
+                        merge_sources(root, job)
+                if store is not None and merged:
+                    # Already synced, so the store needs the grown sources lists separately
+                    store.save_sources(merged.values())
+
+            changed = None
+            jobs = fetched
+            if store is not None:
+                jobs, changed = store.sync(fetched)
+            if near is not None:
+                # sync() hands back copies of unchanged postings
+                emitted.update((id(f), j) for f, j in zip(fetched, jobs))
+
+            for i in range(0, len(jobs), batch_size):
+                if stop.is_set():
+                    return
+                batch = jobs[i:i + batch_size]
+                if state.fetch_descriptions:
+                    enrich_descriptions([j for j in batch if changed is None or j.job_id in changed])
+                    if store is not None:
+                        store.save_descriptions(batch)
+                if not _put(out_q, batch, stop):
+                    return
+    except Exception as e:
+        print(f"Stream: producer failed: {e}")
+    finally:
+        _put(out_q, _DONE, stop)
+
+
+def stream_match(state, batch_size=None, queue_size=None):
+    """
+    Returns:
+        (jobs, matches): every job seen this run, and the top_k
+        (job, score) tuples among them, best first
+    """
+    batch_size = batch_size or config.STREAM_BATCH_SIZE
+    queue_size = queue_size or config.STREAM_QUEUE_SIZE
+
+    qvec = embed([state.resume_text])[0]
+    out_q = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    producer = threading.Thread(target=_produce, args=(state, out_q, stop, batch_size), daemon=True)
+    producer.start()
+
+    heap = []                 # (score, tiebreak, job), smallest on top
+    tiebreak = itertools.count()
+    seen = set()
+    jobs, vec_batches = [], []
+    try:
+        while True:
+            batch = out_q.get()
+            if batch is _DONE:
+                break
+            batch = [j for j in batch if j.job_id not in seen]
+            if not batch:
+                continue
+            seen.update(j.job_id for j in batch)
+
+            vecs = embed_jobs(batch)
+            for job, score in zip(batch, vecs @ qvec):
+                if state.filters and not job_matches(job, state.filters):
+                    continue
+                item = (float(score), next(tiebreak), job)
+                if len(heap) < state.top_k:
+                    heapq.heappush(heap, item)
+                elif item[0] > heap[0][0]:
+                    heapq.heapreplace(heap, item)
+
+            jobs.extend(batch)
+            vec_batches.append(vecs)
+    finally:
+        stop.set()
+
+    # Keep the persisted index in step with the staged pipeline
+    if jobs:
+        JobIndex().add(np.concatenate(vec_batches), jobs)
+
+    matches = [(job, score) for score, _, job in sorted(heap, key=lambda x: (-x[0], x[1]))]
+    return jobs, matches
+
+
+def stream_node(state: AgentState) -> AgentState:
+    if state.agent_log is None:
+        state.agent_log = []
+
+    start = time.monotonic()
+    state.jobs, state.matches = stream_match(state)
+    state.agent_log.append(
+        f"Stream: fetched, embedded and ranked {len(state.jobs)} jobs from {state.use_sources} "
+        f"in micro-batches of {config.STREAM_BATCH_SIZE} (top_k={state.top_k}, {time.monotonic() - start:.1f}s)"
+    )
+    return state
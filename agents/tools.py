@@ -1,3 +1,7 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import config
 from jobs.remoteok import fetch_jobs as remoteok
 from jobs.remotive import fetch_jobs as remotive
 from jobs.weworkremotely import fetch_jobs as wwr
@@ -5,7 +9,7 @@ from jobs.newgrad_jobs import fetch_jobs as newgrad
 from jobs.indeed import fetch_jobs as indeed
 from jobs.adzuna import fetch_jobs as adzuna
 from jobs.greenhouse import fetch_jobs as greenhouse
-from agents.enrich import fetch_job_description
+from agents.enrich import enrich_descriptions
 
 SOURCE_MAP = {
     "RemoteOK": remoteok,
@@ -17,32 +21,107 @@ SOURCE_MAP = {
     "Greenhouse": greenhouse,
 }
 
-def ingest_jobs(sources, limit=150):
+def ingest_jobs(sources, limit=150, concurrent=None, source_timeout=None, total_timeout=None):
     """
     Fetch jobs from multiple sources
     
     Args:
         sources: List of source names (e.g., ['RemoteOK', 'Remotive'])
         limit: Max jobs per source
+        concurrent: Fetch all sources at once (defaults to config.CONCURRENT_INGEST)
+        source_timeout: Seconds to wait for any single source (concurrent mode)
+        total_timeout: Seconds to wait for the whole ingest (concurrent mode)
     
     Returns:
         List of Job objects
     """
-    jobs = []
+    if concurrent is None:
+        concurrent = config.CONCURRENT_INGEST
+
+    selected = []
     for s in sources:
         if s in SOURCE_MAP:
-            try:
-                print(f"Fetching from {s}...")
-                source_jobs = SOURCE_MAP[s](limit=limit)
-                jobs.extend(source_jobs)
-                print(f"✓ Fetched {len(source_jobs)} jobs from {s}")
-            except Exception as e:
-                print(f"✗ Failed to fetch from {s}: {e}")
+            selected.append(s)
         else:
             print(f"Warning: Unknown source '{s}'")
+
+    if concurrent and len(selected) > 1:
+        jobs = []
+        for _, source_jobs in iter_ingest(selected, limit, source_timeout, total_timeout):
+            jobs.extend(source_jobs)
+        return jobs
+
+    jobs = []
+    for s in selected:
+        try:
+            print(f"Fetching from {s}...")
+            source_jobs = SOURCE_MAP[s](limit=limit)
+            jobs.extend(source_jobs)
+            print(f"✓ Fetched {len(source_jobs)} jobs from {s}")
+        except Exception as e:
+            print(f"✗ Failed to fetch from {s}: {e}")
     
     return jobs
 
+
+def iter_ingest(sources, limit=150, source_timeout=None, total_timeout=None):
+    """
+    Run every source on its own worker thread and yield (source, jobs) as
+    each one finishes.
+
+    A source that misses its deadline (or the global one) is abandoned: its
+    jobs are dropped and the remaining sources are not held up by it.
+    """
+    sources = [s for s in sources if s in SOURCE_MAP]
+    if not sources:
+        return
+    if source_timeout is None:
+        source_timeout = config.INGEST_SOURCE_TIMEOUT
+    if total_timeout is None:
+        total_timeout = config.INGEST_TOTAL_TIMEOUT
+
+    start = time.monotonic()
+    global_deadline = start + total_timeout
+
+    pool = ThreadPoolExecutor(
+        max_workers=max(1, min(config.INGEST_WORKERS, len(sources))),
+        thread_name_prefix="ingest",
+    )
+    pending = {}
+    for s in sources:
+        print(f"Fetching from {s}...")
+        future = pool.submit(SOURCE_MAP[s], limit=limit)
+        pending[future] = (s, min(start + source_timeout, global_deadline))
+
+    try:
+        while pending:
+            next_deadline = min(deadline for _, deadline in pending.values())
+            done, _ = wait(
+                pending,
+                timeout=max(0.0, next_deadline - time.monotonic()),
+                return_when=FIRST_COMPLETED,
+            )
+
+            for future in done:
+                s, _ = pending.pop(future)
+                try:
+                    source_jobs = future.result()
+                except Exception as e:
+                    print(f"✗ Failed to fetch from {s}: {e}")
+                    continue
+                print(f"✓ Fetched {len(source_jobs)} jobs from {s} ({time.monotonic() - start:.1f}s)")
+                yield s, source_jobs
+
+            now = time.monotonic()
+            for future, (s, deadline) in list(pending.items()):
+                if now >= deadline:
+                    future.cancel()
+                    del pending[future]
+                    print(f"✗ Timed out fetching from {s} after {now - start:.1f}s")
+    finally:
+        # Don't block on stragglers; their own request timeouts will end them
+        pool.shutdown(wait=False, cancel_futures=True)
+
 def enrich_jobs(jobs):
     """
     Fetch full job descriptions for jobs with short descriptions
@@ -53,14 +132,4 @@ def enrich_jobs(jobs):
     Returns:
         List of Job objects with enriched descriptions
     """
-    enriched = []
-    for j in jobs:
-        if not j.description or len(j.description) < 200:
-            try:
-                full_desc = fetch_job_description(j.url)
-                if full_desc:
-                    j.description = full_desc
-            except Exception as e:
-                print(f"Failed to enrich job {j.job_id}: {e}")
-        enriched.append(j)
-    return enriched
\ No newline at end of file
+    return enrich_descriptions(jobs, min_chars=200)
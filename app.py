@@ -7,7 +7,7 @@ if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 import streamlit as st
-from agents.graph import job_graph
+from agents.graph import get_job_graph
 from utils.text import clean_html
 from utils.logger import app_logger
 import config
@@ -19,6 +19,11 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+if config.EMBEDDING_WARMUP:
+    # Load the model while the user fills in the form; repeat calls are no-ops
+    from rag.embeddings import warm_up
+    warm_up()
+
 # Custom CSS
 st.markdown("""
 <style>
@@ -89,6 +94,24 @@ with st.sidebar:
             help="Select which job boards to search"
         )
         
+        location_filter = st.text_input(
+            "Location filter",
+            placeholder="e.g. Remote, US",
+            help="Only show jobs whose location includes one of these (comma-separated)"
+        )
+
+        tag_filter = st.text_input(
+            "Tag filter",
+            placeholder="e.g. python, kubernetes",
+            help="Only show jobs with at least one of these tags (comma-separated)"
+        )
+
+        only_selected_sources = st.checkbox(
+            "Only show jobs from the selected sources",
+            value=False,
+            help="Jobs stored from earlier searches on other boards are ranked too otherwise"
+        )
+
         fetch_descriptions = st.checkbox(
             "Fetch full job descriptions",
             value=False,  # Default to False for speed
@@ -165,6 +188,12 @@ if search_button:
     if not intent.strip():
         st.warning("💡 Tip: Add a job search intent for better results!")
     
+    filters = {
+        "location": [v.strip() for v in location_filter.split(",") if v.strip()],
+        "tag": [v.strip() for v in tag_filter.split(",") if v.strip()],
+        "source": sources if only_selected_sources else [],
+    }
+
     # ✅ FIX: Pass user settings to the graph
     initial_state = {
         "resume_text": resume_text,
@@ -173,6 +202,7 @@ if search_button:
         "fetch_descriptions": fetch_descriptions,  # ✅ User preference
         "top_k": top_k,  # ✅ User-selected count
         "run_gap_analysis": run_gap_analysis,  # ✅ User preference
+        "filters": {facet: values for facet, values in filters.items() if values},
     }
     
     # Progress tracking
@@ -190,7 +220,7 @@ if search_button:
         progress_bar.progress(60)
         
         # Execute the agent graph
-        final_state = job_graph.invoke(initial_state)
+        final_state = get_job_graph().invoke(initial_state)
         
         status_text.text("✨ Generating explanations...")
         progress_bar.progress(80)
@@ -249,12 +279,22 @@ if st.session_state.results:
                 
             with cols[1]:
                 st.metric("Match", f"{score:.3f}", delta=None)
-                st.markdown(f"*{getattr(job, 'source', 'Unknown')}*")
+                st.markdown(f"*{', '.join(getattr(job, 'sources', None) or [getattr(job, 'source', 'Unknown')])}*")
             
             # Job details
             job_col1, job_col2 = st.columns([3, 1])
             
             with job_col1:
+                job_explanation = final_state.get("match_explanations", {}).get(job.job_id)
+                job_gaps = final_state.get("match_gaps", {}).get(job.job_id)
+                if job_explanation or job_gaps:
+                    with st.expander("💡 Fit & Skill Gaps"):
+                        if job_explanation:
+                            st.write(job_explanation)
+                        if job_gaps:
+                            st.markdown("**Skill gaps**")
+                            st.write(job_gaps)
+
                 if job.description:
                     with st.expander("📄 View Job Description"):
                         clean_desc = clean_html(job.description)
@@ -0,0 +1,129 @@
+"""
+Conditional GET check against a local stub feed server
+
+Serves a JSON feed from http.server on localhost and drives
+jobs.conditional.fetch_conditional through the full revalidation cycle,
+with the feed cache in a temporary directory:
+
+    1. first fetch        200, no validators sent, payload parsed and stored
+    2. unchanged feed     If-None-Match / If-Modified-Since sent, 304, stored
+                          payload returned without parsing
+    3. changed feed       stale validators sent, 200, new payload parsed
+
+Exits non-zero on the first failed check, and prints the time of a full
+download + parse next to a 304 revalidation of the same feed.
+
+Usage:
+    python benchmarks/conditional_fetch.py
+    python benchmarks/conditional_fetch.py --jobs 20000
+"""
+import argparse
+import json
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import config
+from jobs.conditional import fetch_conditional
+
+
+class StubFeed(BaseHTTPRequestHandler):
+    """GET /feed with ETag / Last-Modified; answers 304 when the request's validators match"""
+    body = b"[]"
+    etag = '"v1"'
+    last_modified = "Mon, 05 Oct 2026 10:00:00 GMT"
+    requests = []  # (status, If-None-Match, If-Modified-Since) per request
+
+    def do_GET(self):
+        cls = type(self)
+        inm = self.headers.get("If-None-Match")
+        ims = self.headers.get("If-Modified-Since")
+        status = 304 if inm == cls.etag or (inm is None and ims == cls.last_modified) else 200
+        cls.requests.append((status, inm, ims))
+
+        self.send_response(status)
+        self.send_header("ETag", cls.etag)
+        self.send_header("Last-Modified", cls.last_modified)
+        if status == 200:
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(cls.body)))
+        self.end_headers()
+        if status == 200:
+            self.wfile.write(cls.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def check(label, ok):
+    print(f"{'ok  ' if ok else 'FAIL'} {label}")
+    if not ok:
+        sys.exit(1)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Check the 200 -> 304 -> 200 cycle of fetch_conditional")
+    ap.add_argument("--jobs", type=int, default=5000, help="Jobs in the stub feed")
+    args = ap.parse_args()
+
+    def feed(version):
+        jobs = [{"id": i, "title": f"Engineer {i}", "description": "python remote " * 40, "v": version}
+                for i in range(args.jobs)]
+        return json.dumps(jobs).encode("utf-8")
+
+    parsed = []
+
+    def parse(r):
+        parsed.append(r.status_code)
+        return r.json()
+
+    config.ENABLE_CACHING = True
+    config.CACHE_DIR = Path(tempfile.mkdtemp(prefix="feeds-"))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubFeed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/feed"
+
+    try:
+        StubFeed.body = feed(1)
+        start = time.perf_counter()
+        data = fetch_conditional(url, parse)
+        full = time.perf_counter() - start
+        status, inm, ims = StubFeed.requests[-1]
+        check("first fetch: 200 without validators", status == 200 and inm is None and ims is None)
+        check("first fetch: payload parsed", len(parsed) == 1 and len(data) == args.jobs)
+
+        start = time.perf_counter()
+        again = fetch_conditional(url, parse)
+        revalidate = time.perf_counter() - start
+        status, inm, ims = StubFeed.requests[-1]
+        check("unchanged feed: If-None-Match sent", inm == StubFeed.etag)
+        check("unchanged feed: If-Modified-Since sent", ims == StubFeed.last_modified)
+        check("unchanged feed: 304 served from the cache without parsing", status == 304 and len(parsed) == 1)
+        check("unchanged feed: same payload", again == data)
+
+        StubFeed.body, StubFeed.etag = feed(2), '"v2"'
+        StubFeed.last_modified = "Tue, 06 Oct 2026 10:00:00 GMT"
+        fresh = fetch_conditional(url, parse)
+        status, inm, _ = StubFeed.requests[-1]
+        check("changed feed: stale validator sent, 200", status == 200 and inm == '"v1"')
+        check("changed feed: new payload parsed", len(parsed) == 2 and fresh[0]["v"] == 2)
+
+        fetch_conditional(url, parse)
+        check("changed feed: new validators stored", StubFeed.requests[-1][:2] == (304, '"v2"'))
+    finally:
+        server.shutdown()
+
+    print(f"\n{args.jobs} jobs, {len(StubFeed.body) / 1e6:.1f} MB")
+    print(f"200 download + parse: {full * 1000:8.1f} ms")
+    print(f"304 revalidation:     {revalidate * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Job page text extraction: BeautifulSoup tree vs streaming parser
+
+Checks that utils.html_text.visible_text gives exactly what the old
+BeautifulSoup-based fetch_job_description did on every page in
+fixtures/job_pages (whole-page and 7-byte chunks, with and without the
+character cap), then reports time and peak memory per page for both.
+
+Usage:
+    python benchmarks/html_extract.py
+    python benchmarks/html_extract.py --repeat 20 --max-chars 6000
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from bs4 import BeautifulSoup
+
+from utils.html_text import visible_text
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures" / "job_pages"
+
+
+def reference_text(page: bytes, max_chars=6000):
+    """The pre-streaming fetch_job_description body, applied to a downloaded page"""
+    soup = BeautifulSoup(page.decode("utf-8", errors="replace"), "html.parser")
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+    text = soup.get_text(separator=" ")
+    text = " ".join(text.split())
+    if len(text) > max_chars:
+        text = text[:max_chars]
+    return text
+
+
+def streaming_text(page: bytes, max_chars=6000, chunk_size=16384):
+    chunks = (page[i:i + chunk_size] for i in range(0, len(page), chunk_size))
+    return visible_text(chunks, max_chars=max_chars)
+
+
+def load_pages():
+    pages = {p.name: p.read_bytes() for p in sorted(FIXTURES.glob("*.html"))}
+    # Big career pages: multi-megabyte app state in front of the description
+    pages["large_spa (generated)"] = pages["spa_shell.html"].replace(b"<body>", b"<body>" + b"x " * 8, 1) * 10
+    pages["large_article (generated)"] = pages["long_description.html"] * 40
+    return pages
+
+
+def check(pages):
+    failures = 0
+    for name, page in pages.items():
+        for max_chars in (6000, 10 ** 9):
+            expected = reference_text(page, max_chars)
+            for chunk_size in (16384, 7):
+                got = streaming_text(page, max_chars, chunk_size)
+                if got != expected:
+                    failures += 1
+                    at = next((i for i, (a, b) in enumerate(zip(got, expected)) if a != b), min(len(got), len(expected)))
+                    print(f"✗ {name} max_chars={max_chars} chunk={chunk_size}: differs at char {at}")
+                    print(f"    expected: {expected[max(0, at - 40):at + 40]!r}")
+                    print(f"    got:      {got[max(0, at - 40):at + 40]!r}")
+    print(f"{'✓' if not failures else '✗'} output check: {failures} mismatches across {len(pages)} pages")
+    return failures
+
+
+def measure(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare job page text extraction")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--max-chars", type=int, default=6000)
+    args = ap.parse_args()
+
+    pages = load_pages()
+    failures = check(pages)
+
+    print(f"\n{'page':<28} {'KB':>7} {'bs4 ms':>8} {'stream ms':>10} {'bs4 peak KB':>12} {'stream peak KB':>15}")
+    for name, page in pages.items():
+        bs_time, bs_peak = measure(lambda: reference_text(page, args.max_chars), args.repeat)
+        st_time, st_peak = measure(lambda: streaming_text(page, args.max_chars), args.repeat)
+        print(f"{name:<28} {len(page) / 1024:>7.0f} {bs_time * 1000:>8.1f} {st_time * 1000:>10.1f} "
+              f"{bs_peak / 1024:>12.0f} {st_peak / 1024:>15.0f}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+HTML parsing throughput (pages/sec) by parse worker count
+
+Parses the fixture job pages, repeated to --pages, with the streaming
+extractor used for enrichment (utils.html_text.page_text) and with the
+BeautifulSoup-based utils.text.clean_html, serially (0 workers) and across
+parse worker processes. Worker start-up is excluded from the timings.
+
+Usage:
+    python benchmarks/parse_pool.py
+    python benchmarks/parse_pool.py --pages 400 --workers 0,1,2,4,8
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import config
+from utils.html_text import page_text
+from utils.parse_pool import map_parse, shutdown
+from utils.text import clean_html
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures" / "job_pages"
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Pages/sec of HTML parsing by worker count")
+    ap.add_argument("--pages", type=int, default=200)
+    ap.add_argument("--workers", default="0,1,2,4")
+    args = ap.parse_args()
+
+    fixtures = [p.read_bytes() for p in sorted(FIXTURES.glob("*.html"))]
+    pages = [fixtures[i % len(fixtures)] for i in range(args.pages)]
+    texts = [p.decode("utf-8") for p in pages]
+    config.PARSE_MIN_BYTES = 0
+
+    print(f"{len(pages)} pages, {sum(map(len, pages)) / 1e6:.1f} MB, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'page_text p/s':>14} {'clean_html p/s':>15}")
+    for workers in (int(w) for w in args.workers.split(",")):
+        rates = []
+        for fn, items in ((page_text, pages), (clean_html, texts)):
+            map_parse(fn, items[:2 * max(workers, 1)], workers=workers, chunksize=1)  # start the workers
+            start = time.perf_counter()
+            map_parse(fn, items, workers=workers, chunksize=max(1, len(items) // (8 * max(workers, 1))))
+            rates.append(len(items) / (time.perf_counter() - start))
+        print(f"{workers:>8} {rates[0]:>14.1f} {rates[1]:>15.1f}")
+        shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,7 @@ from pathlib import Path
 
 # Base paths
 BASE_DIR = Path(__file__).parent
-STORAGE_DIR = BASE_DIR / "storage"
-STORAGE_DIR.mkdir(exist_ok=True)
+STORAGE_DIR = BASE_DIR / "storage"  # created on first write, not at import
 
 # LLM Configuration - Use Groq (free cloud API)
 USE_CLOUD_LLM = os.getenv("USE_CLOUD_LLM", "true").lower() == "true"
@@ -12,6 +11,12 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.1-70b-versatile")
 LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.0"))
 
+# Shared LLM HTTP client: connection pool size and retries on 429/5xx
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "8"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BACKOFF = float(os.getenv("LLM_RETRY_BACKOFF", "1.0"))  # seconds, doubled per retry
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "20"))
+
 # Fallback to Ollama for local development
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 OLLAMA_MODEL = "llama3.1:8b"
@@ -19,24 +24,92 @@ OLLAMA_MODEL = "llama3.1:8b"
 # Embedding Configuration
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
 EMBEDDING_DIM = 384
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "1"))  # >1 = multi-process CPU encode pool
+EMBEDDING_MP_MIN_TEXTS = int(os.getenv("EMBEDDING_MP_MIN_TEXTS", "2000"))  # smaller inputs stay in-process
+EMBEDDING_WARMUP = os.getenv("EMBEDDING_WARMUP", "false").lower() == "true"  # load the model in the background at startup
+EMBEDDING_MAX_TOKENS = int(os.getenv("EMBEDDING_MAX_TOKENS", "0"))  # job text token budget; 0 = model limit
+EMBEDDING_CHUNKING = os.getenv("EMBEDDING_CHUNKING", "false").lower() == "true"  # mean-pool chunks of long descriptions
+EMBEDDING_MAX_CHUNKS = int(os.getenv("EMBEDDING_MAX_CHUNKS", "4"))
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()  # torch | onnx | onnx-int8 (needs onnxruntime)
+ONNX_DIR = Path(os.getenv("ONNX_DIR", str(STORAGE_DIR / "onnx")))  # exported ONNX models
 
 # Job Fetching Configuration
 DEFAULT_JOB_LIMIT = int(os.getenv("DEFAULT_JOB_LIMIT", "100"))
 FETCH_TIMEOUT = int(os.getenv("FETCH_TIMEOUT", "20"))
 
+# Concurrent ingestion: all selected sources are fetched at once
+CONCURRENT_INGEST = os.getenv("CONCURRENT_INGEST", "true").lower() == "true"
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "8"))
+INGEST_SOURCE_TIMEOUT = float(os.getenv("INGEST_SOURCE_TIMEOUT", "45"))  # per-source deadline (s)
+INGEST_TOTAL_TIMEOUT = float(os.getenv("INGEST_TOTAL_TIMEOUT", "60"))  # global deadline (s)
+DEDUP_NEAR = os.getenv("DEDUP_NEAR", "true").lower() == "true"  # collapse cross-posted near-duplicates
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.7"))  # min estimated Jaccard similarity
+DEDUP_TITLE_MIN = float(os.getenv("DEDUP_TITLE_MIN", "0.5"))  # min title word overlap
+
+# Streaming pipeline (agents/stream.py): micro-batch size and batches buffered ahead
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "32"))
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "4"))
+
+# Description enrichment: concurrent page fetches over keep-alive connections
+ENRICH_WORKERS = int(os.getenv("ENRICH_WORKERS", "16"))
+ENRICH_PER_HOST = int(os.getenv("ENRICH_PER_HOST", "4"))
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "0"))  # HTML parse worker processes; 0 = parse in the fetching thread
+PARSE_MIN_BYTES = int(os.getenv("PARSE_MIN_BYTES", "32768"))  # smaller pages are parsed inline
+ENRICH_MAX_BYTES = int(os.getenv("ENRICH_MAX_BYTES", str(2 * 1024 * 1024)))  # stop reading a job page after this
+
 # Matching Configuration
 DEFAULT_TOP_K = int(os.getenv("DEFAULT_TOP_K", "10"))
 DEFAULT_RUN_GAP_ANALYSIS = os.getenv("DEFAULT_RUN_GAP_ANALYSIS", "true").lower() == "true"
+DEFAULT_FETCH_DESCRIPTIONS = os.getenv("DEFAULT_FETCH_DESCRIPTIONS", "true").lower() == "true"
+
+# Per-match explanations / gap analyses for the top N matches (1 = top match only)
+MATCH_ANALYSIS_TOP_N = int(os.getenv("MATCH_ANALYSIS_TOP_N", "10"))
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "5"))  # jobs packed into one LLM request
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))  # concurrent LLM requests
+
+# Vector index backend: "brute" (exact, default) or "ivf" (approximate, rag/ann.py)
+INDEX_BACKEND = os.getenv("INDEX_BACKEND", "brute").lower()
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "8"))  # higher = better recall, slower
+IVF_MIN_ROWS = int(os.getenv("IVF_MIN_ROWS", "5000"))  # below this, brute force is used anyway
+
+# In-memory vector storage for brute-force search: "float32", "float16" or "int8" (rag/quantize.py)
+INDEX_STORAGE = os.getenv("INDEX_STORAGE", "float32").lower()
+INDEX_QUANT_SCALE = os.getenv("INDEX_QUANT_SCALE", "vector").lower()  # int8 scales: "vector" or "dimension"
+INDEX_RESCORE = os.getenv("INDEX_RESCORE", "true").lower() == "true"  # exact float32 rescoring of the shortlist
+INDEX_RESCORE_FACTOR = int(os.getenv("INDEX_RESCORE_FACTOR", "4"))  # shortlist = top_k * factor
+
+# Retrieval: "dense" (vectors only), "hybrid" (dense + BM25 fused by reciprocal rank)
+# or "lexical" (BM25 order) -- see rag/lexical.py. Reported scores are always cosine.
+SEARCH_MODE = os.getenv("SEARCH_MODE", "dense").lower()
+HYBRID_DEPTH = int(os.getenv("HYBRID_DEPTH", "100"))  # rows taken from each ranking before fusion
+RRF_K = int(os.getenv("RRF_K", "60"))
+LEXICAL_PREFILTER = int(os.getenv("LEXICAL_PREFILTER", "0"))  # >0: dense-score only the top N BM25 rows
 
 # New Job Source API Keys
 ADZUNA_APP_ID = os.getenv("ADZUNA_APP_ID", "")
 ADZUNA_APP_KEY = os.getenv("ADZUNA_APP_KEY", "")
 
 # Storage paths
+JOB_STORE_PATH = STORAGE_DIR / "jobs.sqlite"
+USE_JOB_STORE = os.getenv("USE_JOB_STORE", "true").lower() == "true"
+OFFLINE_MAX_AGE_DAYS = float(os.getenv("OFFLINE_MAX_AGE_DAYS", "30"))  # offline runs ignore older postings
 FAISS_INDEX_PATH = STORAGE_DIR / "jobs.faiss"
 META_PATH = STORAGE_DIR / "meta.npy"
 CACHE_DIR = STORAGE_DIR / "cache"
-CACHE_DIR.mkdir(exist_ok=True)
+
+# Cached job page descriptions (storage/cache.py), keyed by job URL
+DESCRIPTION_CACHE_TTL = float(os.getenv("DESCRIPTION_CACHE_TTL", str(7 * 24 * 3600)))
+DESCRIPTION_CACHE_MAX_ENTRIES = int(os.getenv("DESCRIPTION_CACHE_MAX_ENTRIES", "20000"))
+
+# Feed validators (ETag / Last-Modified) and last payload per source URL
+FEED_CACHE_TTL = float(os.getenv("FEED_CACHE_TTL", str(30 * 24 * 3600)))
+FEED_CACHE_MAX_ENTRIES = int(os.getenv("FEED_CACHE_MAX_ENTRIES", "500"))
+
+# LLM completions keyed by provider, model, max_tokens, temperature and prompt hash
+ENABLE_LLM_CACHE = os.getenv("ENABLE_LLM_CACHE", "true").lower() == "true"
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000"))
 
 # API Configuration
 REQUEST_HEADERS = {
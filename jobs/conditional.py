@@ -0,0 +1,59 @@
+"""
+Conditional GET for feed-style sources
+
+The validators (ETag / Last-Modified) and the parsed payload of the last
+200 response are kept per URL in the "feeds" disk cache. Later requests
+send If-None-Match / If-Modified-Since, and a 304 reuses the stored
+payload without downloading or parsing it again.
+"""
+import json
+from urllib.parse import urlencode
+
+import requests
+
+from storage.cache import feed_cache
+
+
+def fetch_conditional(url, parse, params=None, headers=None, timeout=30):
+    """
+    GET url, revalidating the stored copy if there is one
+
+    Args:
+        url: Feed or API URL
+        parse: Callable taking the 200 response and returning a JSON-serializable payload
+        params: Query parameters (part of the cache key)
+        headers: Extra request headers
+        timeout: Request timeout in seconds
+
+    Returns:
+        The parsed payload, either fresh or reused on 304 Not Modified
+    """
+    cache = feed_cache()
+    key = f"{url}?{urlencode(sorted(params.items()))}" if params else url
+
+    stored = None
+    if cache is not None:
+        raw = cache.get(key)
+        if raw:
+            stored = json.loads(raw)
+
+    req_headers = dict(headers or {})
+    if stored:
+        if stored.get("etag"):
+            req_headers["If-None-Match"] = stored["etag"]
+        if stored.get("last_modified"):
+            req_headers["If-Modified-Since"] = stored["last_modified"]
+
+    r = requests.get(url, params=params, headers=req_headers, timeout=timeout)
+    if r.status_code == 304 and stored:
+        # Refresh the entry so it isn't evicted while the feed stays unchanged
+        cache.set(key, raw)
+        return stored["data"]
+    r.raise_for_status()
+
+    data = parse(r)
+    etag = r.headers.get("ETag")
+    last_modified = r.headers.get("Last-Modified")
+    if cache is not None and (etag or last_modified):
+        cache.set(key, json.dumps({"etag": etag, "last_modified": last_modified, "data": data}))
+    return data
@@ -2,6 +2,7 @@ import requests
 import hashlib
 from bs4 import BeautifulSoup
 from rag.schemas import Job
+from utils.parse_pool import run_parse
 from urllib.parse import urljoin
 
 BASE_URL = "https://www.indeed.com"
@@ -30,52 +31,60 @@ def fetch_jobs(limit=100, query="software engineer", location="Remote"):
         response = requests.get(search_url, headers=HEADERS, params=params, timeout=20)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.text, "html.parser")
-        
-        # Indeed's job cards (selector may change)
-        job_cards = soup.find_all("div", class_="job_seen_beacon")
-        
-        for card in job_cards[:limit]:
-            try:
-                # Extract title
-                title_elem = card.find("h2", class_="jobTitle")
-                if not title_elem:
-                    continue
-                title = title_elem.get_text(strip=True)
-                
-                # Extract company
-                company_elem = card.find("span", {"data-testid": "company-name"})
-                company = company_elem.get_text(strip=True) if company_elem else "Unknown"
-                
-                # Extract location
-                location_elem = card.find("div", {"data-testid": "text-location"})
-                job_location = location_elem.get_text(strip=True) if location_elem else "Remote"
-                
-                # Extract job link
-                link_elem = title_elem.find("a")
-                job_link = urljoin(BASE_URL, link_elem["href"]) if link_elem and link_elem.get("href") else ""
-                
-                # Extract snippet
-                snippet_elem = card.find("div", class_="job-snippet")
-                description = snippet_elem.get_text(strip=True) if snippet_elem else ""
-                
-                jid = hashlib.md5((title + company + job_link).encode()).hexdigest()[:12]
-                
-                jobs.append(Job(
-                    job_id=jid,
-                    title=title,
-                    company=company,
-                    location=job_location,
-                    description=description,
-                    tags=["indeed"],
-                    url=job_link,
-                    source="Indeed"
-                ))
-            except Exception as e:
-                print(f"Error parsing Indeed job card: {e}")
-                continue
-        
+        jobs = run_parse(parse_jobs, response.text, limit)
+
     except Exception as e:
         print(f"Error fetching Indeed jobs: {e}")
     
-    return jobs
\ No newline at end of file
+    return jobs
+
+
+def parse_jobs(html, limit=100):
+    """Job cards from an Indeed search results page (runs in a parse worker when enabled)"""
+    jobs = []
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Indeed's job cards (selector may change)
+    job_cards = soup.find_all("div", class_="job_seen_beacon")
+
+    for card in job_cards[:limit]:
+        try:
+            # Extract title
+            title_elem = card.find("h2", class_="jobTitle")
+            if not title_elem:
+                continue
+            title = title_elem.get_text(strip=True)
+
+            # Extract company
+            company_elem = card.find("span", {"data-testid": "company-name"})
+            company = company_elem.get_text(strip=True) if company_elem else "Unknown"
+
+            # Extract location
+            location_elem = card.find("div", {"data-testid": "text-location"})
+            job_location = location_elem.get_text(strip=True) if location_elem else "Remote"
+
+            # Extract job link
+            link_elem = title_elem.find("a")
+            job_link = urljoin(BASE_URL, link_elem["href"]) if link_elem and link_elem.get("href") else ""
+
+            # Extract snippet
+            snippet_elem = card.find("div", class_="job-snippet")
+            description = snippet_elem.get_text(strip=True) if snippet_elem else ""
+
+            jid = hashlib.md5((title + company + job_link).encode()).hexdigest()[:12]
+
+            jobs.append(Job(
+                job_id=jid,
+                title=title,
+                company=company,
+                location=job_location,
+                description=description,
+                tags=["indeed"],
+                url=job_link,
+                source="Indeed"
+            ))
+        except Exception as e:
+            print(f"Error parsing Indeed job card: {e}")
+            continue
+
+    return jobs
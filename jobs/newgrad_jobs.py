@@ -2,6 +2,7 @@ import requests
 import hashlib
 from bs4 import BeautifulSoup
 from rag.schemas import Job
+from utils.parse_pool import run_parse
 
 BASE_URL = "https://www.newgrad-jobs.com"
 
@@ -17,7 +18,12 @@ def fetch_jobs(limit=200):
     resp = requests.get(BASE_URL, headers=HEADERS, timeout=30)
     resp.raise_for_status()
 
-    soup = BeautifulSoup(resp.text, "html.parser")
+    return run_parse(parse_jobs, resp.text, limit)
+
+
+def parse_jobs(html, limit=200):
+    """Job links from the newgrad-jobs.com page (runs in a parse worker when enabled)"""
+    soup = BeautifulSoup(html, "html.parser")
 
     jobs = []
 
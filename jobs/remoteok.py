@@ -1,11 +1,11 @@
-import requests
 import hashlib
 from rag.schemas import Job
+from jobs.conditional import fetch_conditional
 
 URL = "https://remoteok.com/api"
 
 def fetch_jobs(limit=100):
-    data = requests.get(URL, headers={"User-Agent": "Mozilla/5.0"}, timeout=30).json()[1:]
+    data = fetch_conditional(URL, lambda r: r.json(), headers={"User-Agent": "Mozilla/5.0"}, timeout=30)[1:]
     jobs = []
     for j in data[:limit]:
         title = j.get("position", "")
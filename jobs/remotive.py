@@ -1,6 +1,6 @@
-import requests
 import hashlib
 from rag.schemas import Job
+from jobs.conditional import fetch_conditional
 
 URL = "https://remotive.com/api/remote-jobs"
 
@@ -9,7 +9,7 @@ def fetch_jobs(limit=200, category=None):
     if category:
         params["category"] = category
 
-    data = requests.get(URL, params=params, timeout=30).json()
+    data = fetch_conditional(URL, lambda r: r.json(), params=params, timeout=30)
     items = data.get("jobs", [])
     jobs = []
     for j in items[:limit]:
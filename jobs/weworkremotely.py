@@ -1,6 +1,8 @@
 import feedparser
 import hashlib
+import config
 from rag.schemas import Job
+from jobs.conditional import fetch_conditional
 
 # Multiple category feeds; add more if you want
 FEEDS = [
@@ -9,11 +11,30 @@ FEEDS = [
     "https://weworkremotely.com/categories/remote-devops-sysadmin-jobs.rss",
 ]
 
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (AutoJobScout/1.0)"
+}
+
+
+def _parse_feed(response):
+    """Keep only the entry fields we use, so the payload can be cached as JSON"""
+    feed = feedparser.parse(response.content)
+    return [
+        {k: e.get(k, "") for k in ("title", "link", "summary", "description")}
+        for e in feed.entries
+    ]
+
+
 def fetch_jobs(limit=200):
     jobs = []
     for feed_url in FEEDS:
-        feed = feedparser.parse(feed_url)
-        for e in feed.entries[:limit]:
+        try:
+            entries = fetch_conditional(feed_url, _parse_feed, headers=HEADERS, timeout=config.FETCH_TIMEOUT)
+        except Exception as e:
+            # One broken category feed shouldn't drop the others
+            print(f"Error fetching {feed_url}: {e}")
+            continue
+        for e in entries[:limit]:
             title = e.get("title", "")
             link = e.get("link", "")
             # WWR often puts company in title like "Company: Role"
@@ -1,6 +1,8 @@
 import argparse
 from rich import print
-from agents.graph import job_graph
+from agents.graph import get_job_graph
+from rag.facets import FACETS
+import config
 
 
 def main():
@@ -11,8 +13,49 @@ def main():
         default="machine learning and data science roles",
         help="Job search intent"
     )
+    ap.add_argument(
+        "--offline",
+        action="store_true",
+        help="Match against previously stored jobs without fetching any source"
+    )
+    ap.add_argument(
+        "--planner",
+        choices=["fast", "llm"],
+        default="fast",
+        help="fast: pick sources by embedding similarity (no LLM call); llm: ask the LLM planner"
+    )
+    ap.add_argument(
+        "--stream",
+        action="store_true",
+        help="Embed and rank postings in micro-batches while sources are still fetching"
+    )
+    ap.add_argument(
+        "--warmup",
+        action="store_true",
+        default=config.EMBEDDING_WARMUP,
+        help="Load the embedding model in the background while the graph starts up"
+    )
+    ap.add_argument(
+        "--filter",
+        action="append",
+        default=[],
+        metavar="FACET=VALUE",
+        help="Only rank jobs with this source, location part or tag, e.g. location=remote or tag=python "
+             "(repeat: values of one facet are OR'd, different facets AND'd)"
+    )
     args = ap.parse_args()
 
+    filters = {}
+    for item in args.filter:
+        facet, sep, value = item.partition("=")
+        if not sep or facet.strip() not in FACETS:
+            ap.error(f"--filter expects FACET=VALUE with FACET one of {', '.join(FACETS)}")
+        filters.setdefault(facet.strip(), []).append(value.strip())
+
+    if args.warmup:
+        from rag.embeddings import warm_up
+        warm_up()
+
     # Load resume
     with open(args.resume, "r") as f:
         resume_text = f.read()
@@ -21,22 +64,30 @@ def main():
     initial_state = {
         "resume_text": resume_text,
         "user_intent": args.intent,
+        "offline": args.offline,
+        "planner_mode": args.planner,
+        "streaming": args.stream,
+        "filters": filters,
     }
 
     # 🔥 THIS is the agentic execution
-    final_state = job_graph.invoke(initial_state)
+    final_state = get_job_graph().invoke(initial_state)
 
     matches = final_state.get("matches", [])
 
     print("\n[bold cyan]Top Matches[/bold cyan]\n")
 
+    explanations = final_state.get("match_explanations", {})
+
     for rank, (job, score) in enumerate(matches, start=1):
         print("=" * 90)
         print(f"[bold]{rank}. {job.title} @ {job.company}[/bold]")
         print(f"Score: {score:.3f}")
         print(f"Location: {job.location}")
-        print(f"Source: {getattr(job, 'source', 'Unknown')}")
+        print(f"Source: {', '.join(getattr(job, 'sources', None) or [getattr(job, 'source', 'Unknown')])}")
         print(f"Link: {job.url}")
+        if job.job_id in explanations:
+            print(f"Fit: {explanations[job.job_id]}")
 
     if final_state.get("explanation"):
         print("\n[bold green]Explanation[/bold green]")
@@ -0,0 +1,188 @@
+"""
+Approximate nearest-neighbour search for JobIndex
+
+IVFIndex partitions the vectors with spherical k-means and, at query time,
+only scores the rows in the `nprobe` lists whose centroids are closest to
+the query. Raising nprobe trades speed for recall; nprobe == n_lists is
+exact. Brute-force search in rag.index stays the reference.
+"""
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+class IVFIndex:
+    def __init__(self, n_lists=None, nprobe=8, seed=0):
+        """
+        Args:
+            n_lists: Number of k-means partitions (default: ~4 * sqrt(n_rows))
+            nprobe: Partitions scanned per query (the recall/speed knob)
+            seed: Seed for centroid initialisation
+        """
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        self.seed = seed
+        self.centroids = None   # (n_lists, dim)
+        self.offsets = None     # (n_lists + 1,) start of each list in `order`
+        self.order = None       # row ids grouped by list
+        self.n_rows = 0
+        self.layout = np.zeros((0, 2), dtype=np.int64)  # (segment, rows) built over; set by JobIndex
+
+    def build(self, vectors, iterations=10, sample_per_list=32):
+        """Train centroids on a sample and assign every row to its nearest list"""
+        vectors = np.asarray(vectors, dtype="float32")
+        n = len(vectors)
+        if n == 0:
+            raise ValueError("Cannot build an IVF index over zero vectors")
+
+        n_lists = self.n_lists or int(4 * np.sqrt(n))
+        n_lists = max(1, min(n_lists, n))
+        rng = np.random.default_rng(self.seed)
+
+        sample = vectors[rng.choice(n, size=min(n, n_lists * sample_per_list), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            order = np.argsort(assign, kind="stable")
+            counts = np.bincount(assign, minlength=n_lists)
+            sums = np.zeros_like(centroids)
+            nonempty = np.flatnonzero(counts)
+            sums[nonempty] = np.add.reduceat(sample[order], np.cumsum(counts)[nonempty] - counts[nonempty])
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            # Re-seed empty lists from random sample rows
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+            norms[empty] = 1.0
+            centroids = sums / norms
+
+        assign = np.concatenate([
+            np.argmax(vectors[i:i + 8192] @ centroids.T, axis=1)
+            for i in range(0, n, 8192)
+        ])
+        self.order = np.argsort(assign, kind="stable").astype(np.int64)
+        self.offsets = np.searchsorted(assign[self.order], np.arange(n_lists + 1)).astype(np.int64)
+        self.centroids = centroids.astype("float32")
+        self.n_lists = n_lists
+        self.n_rows = n
+        return self
+
+    def candidates(self, qvecs, nprobe=None):
+        """Row ids to score for each query (one array per query)"""
+        qvecs = np.atleast_2d(np.asarray(qvecs, dtype="float32"))
+        nprobe = max(1, min(nprobe or self.nprobe, self.n_lists))
+        centroid_scores = qvecs @ self.centroids.T
+        if nprobe < self.n_lists:
+            probes = np.argpartition(-centroid_scores, nprobe - 1, axis=1)[:, :nprobe]
+        else:
+            probes = np.tile(np.arange(self.n_lists), (len(qvecs), 1))
+        return [
+            np.concatenate([self.order[self.offsets[l]:self.offsets[l + 1]] for l in row])
+            for row in probes
+        ]
+
+    def search(self, vectors, qvecs, top_k, nprobe=None):
+        """
+        Returns:
+            (ids, scores): lists with one best-first array per query
+        """
+        all_ids, all_scores = [], []
+        for q, cand in zip(np.atleast_2d(qvecs), self.candidates(qvecs, nprobe)):
+            scores = vectors[cand] @ q
+            k = min(top_k, len(cand))
+            top = np.argpartition(-scores, k - 1)[:k] if 0 < k < len(cand) else np.arange(len(cand))
+            top = top[np.argsort(-scores[top], kind="stable")]
+            all_ids.append(cand[top])
+            all_scores.append(scores[top])
+        return all_ids, all_scores
+
+    def save(self, path):
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                centroids=self.centroids,
+                offsets=self.offsets,
+                order=self.order,
+                params=np.array([self.n_lists, self.nprobe, self.seed, self.n_rows], dtype=np.int64),
+                layout=self.layout,
+            )
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            n_lists, nprobe, seed, n_rows = (int(x) for x in data["params"])
+            index = cls(n_lists=n_lists, nprobe=nprobe, seed=seed)
+            index.centroids = data["centroids"]
+            index.offsets = data["offsets"]
+            index.order = data["order"]
+            index.n_rows = n_rows
+            index.layout = data["layout"] if "layout" in data.files else np.zeros((0, 2), dtype=np.int64)
+        return index
+
+
+def recall_report(vectors, ann, qvecs, top_k=10, nprobes=(1, 2, 4, 8, 16, 32)):
+    """
+    Measure recall@k and query time of `ann` against brute-force search
+
+    Returns:
+        List of dicts with nprobe, recall, ms_per_query and speedup, plus a
+        first row for the brute-force reference
+    """
+    vectors = np.asarray(vectors, dtype="float32")
+    qvecs = np.atleast_2d(np.asarray(qvecs, dtype="float32"))
+    k = min(top_k, len(vectors))
+
+    start = time.perf_counter()
+    exact = []
+    for q in qvecs:
+        scores = vectors @ q
+        exact.append(set(np.argpartition(-scores, k - 1)[:k].tolist()))
+    brute_ms = (time.perf_counter() - start) * 1000 / len(qvecs)
+
+    report = [{"nprobe": "brute", "recall": 1.0, "ms_per_query": brute_ms, "speedup": 1.0}]
+    for nprobe in nprobes:
+        if nprobe > ann.n_lists:
+            break
+        start = time.perf_counter()
+        ids, _ = ann.search(vectors, qvecs, k, nprobe=nprobe)
+        ms = (time.perf_counter() - start) * 1000 / len(qvecs)
+        recall = np.mean([len(exact_ids & set(found.tolist())) / k for exact_ids, found in zip(exact, ids)])
+        report.append({"nprobe": nprobe, "recall": float(recall), "ms_per_query": ms, "speedup": brute_ms / ms if ms else float("inf")})
+    return report
+
+
+def main():
+    from rag.index import JobIndex
+
+    ap = argparse.ArgumentParser(description="Recall/speed report for the IVF backend against brute force")
+    ap.add_argument("--path", default=None, help="Index directory (default: storage/index)")
+    ap.add_argument("--queries", type=int, default=200, help="Number of stored jobs to use as queries")
+    ap.add_argument("--top-k", type=int, default=10)
+    ap.add_argument("--n-lists", type=int, default=None)
+    args = ap.parse_args()
+
+    index = JobIndex(args.path)
+    live = np.flatnonzero(index._live)
+    if len(live) == 0:
+        print("Index is empty")
+        return
+    vectors = np.asarray(index.vectors[live], dtype="float32")
+
+    rng = np.random.default_rng(0)
+    queries = vectors[rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)]
+
+    start = time.perf_counter()
+    ann = IVFIndex(n_lists=args.n_lists).build(vectors)
+    print(f"Built IVF over {len(vectors)} vectors, {ann.n_lists} lists in {time.perf_counter() - start:.2f}s")
+
+    print(f"{'nprobe':>8} {'recall@' + str(args.top_k):>10} {'ms/query':>10} {'speedup':>8}")
+    for row in recall_report(vectors, ann, queries, args.top_k):
+        print(f"{row['nprobe']:>8} {row['recall']:>10.3f} {row['ms_per_query']:>10.3f} {row['speedup']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
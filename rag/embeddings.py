@@ -1,10 +1,359 @@
-from sentence_transformers import SentenceTransformer
+"""
+Sentence embeddings for jobs and resumes
+
+embed() encodes with config.EMBEDDING_MODEL in length-sorted batches of
+EMBEDDING_BATCH_SIZE, and for large inputs (EMBEDDING_MP_MIN_TEXTS+) can
+spread the work over EMBEDDING_WORKERS CPU processes. Throughput of the
+last call is available from embedding_stats().
+
+embed_jobs() embeds jobs from one canonical, HTML-free text each, cut near the
+model's token budget up front (the model would truncate the rest anyway), or
+with EMBEDDING_CHUNKING as the mean of up to EMBEDDING_MAX_CHUNKS token windows.
+
+EMBEDDING_BACKEND selects PyTorch (sentence_transformers, the default) or
+ONNX Runtime ("onnx", or "onnx-int8" with quantized weights, see
+rag.onnx_backend). Models are only loaded when first needed; warm_up() does
+that on a background thread ahead of time.
+"""
+import argparse
+import atexit
+import threading
+import time
+
 import numpy as np
 
+import config
+from storage.cache import embedding_cache
+
+MODEL_NAME = config.EMBEDDING_MODEL
+BACKEND = config.EMBEDDING_BACKEND
+
+# English job text averages ~4-5 characters per wordpiece token, so
+# budget * CHARS_PER_TOKEN characters nearly always cover the token budget
+CHARS_PER_TOKEN = 6
+
 _model = None
+_pool = None
+_tokenizer = None
+_lock = threading.RLock()
+_last_stats = {}
+_last_prep = {}
 
-def embed(texts):
+
+def _get_model():
     global _model
-    if _model is None:
-        _model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
-    return np.array(_model.encode(texts, normalize_embeddings=True), dtype="float32")
+    with _lock:
+        if _model is None:
+            if BACKEND == "torch":
+                from sentence_transformers import SentenceTransformer
+                _model = SentenceTransformer(MODEL_NAME, device="cpu")
+            elif BACKEND in ("onnx", "onnx-int8"):
+                from rag.onnx_backend import OnnxEmbedder
+                _model = OnnxEmbedder(MODEL_NAME, quantize=BACKEND == "onnx-int8")
+            else:
+                raise ValueError(f"Unknown EMBEDDING_BACKEND {BACKEND!r} (use torch, onnx or onnx-int8)")
+        return _model
+
+
+def _cache_model_key():
+    # int8 vectors differ slightly from torch ones, so each backend gets its own cache
+    return MODEL_NAME if BACKEND == "torch" else f"{MODEL_NAME}#{BACKEND}"
+
+
+def warm_up(background=True):
+    """
+    Load the embedding model ahead of the first embed() call
+
+    With background=True this returns immediately; an embed() that arrives
+    before loading finishes simply waits for it instead of loading twice.
+    """
+    if not background:
+        _get_model()
+        return None
+
+    def load():
+        try:
+            _get_model()
+        except Exception as e:
+            print(f"Embedding warm-up failed: {e}")
+
+    thread = threading.Thread(target=load, name="embedding-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def _get_pool(workers):
+    """Multi-process encode pool, started once and stopped at exit"""
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = _get_model().start_multi_process_pool(target_devices=["cpu"] * workers)
+            atexit.register(_stop_pool)
+        return _pool
+
+
+def _stop_pool():
+    global _pool
+    if _pool is not None:
+        _get_model().stop_multi_process_pool(_pool)
+        _pool = None
+
+
+def embed(texts, batch_size=None, workers=None):
+    """
+    L2-normalized float32 embeddings, one row per text
+
+    Texts are encoded longest first so each batch (and each worker's chunk)
+    holds similar lengths and wastes little padding; rows come back in the
+    original order.
+    """
+    batch_size = batch_size or config.EMBEDDING_BATCH_SIZE
+    workers = config.EMBEDDING_WORKERS if workers is None else workers
+    texts = list(texts)
+    model = _get_model()
+    if not texts:
+        _last_stats.clear()
+        return np.zeros((0, model.get_sentence_embedding_dimension()), dtype="float32")
+    start = time.perf_counter()
+
+    order = np.argsort([-len(t) for t in texts], kind="stable")
+    sorted_texts = [texts[i] for i in order]
+
+    use_pool = BACKEND == "torch" and workers > 1 and len(texts) >= config.EMBEDDING_MP_MIN_TEXTS
+    if use_pool:
+        vecs = model.encode_multi_process(
+            sorted_texts,
+            _get_pool(workers),
+            batch_size=batch_size,
+            chunk_size=max(batch_size, -(-len(texts) // (workers * 4))),
+            normalize_embeddings=True,
+        )
+    else:
+        vecs = model.encode(sorted_texts, batch_size=batch_size, normalize_embeddings=True)
+
+    out = np.empty((len(texts), model.get_sentence_embedding_dimension()), dtype="float32")
+    out[order] = np.asarray(vecs, dtype="float32").reshape(len(texts), -1)
+
+    elapsed = time.perf_counter() - start
+    _last_stats.clear()
+    _last_stats.update({
+        "texts": len(texts),
+        "seconds": elapsed,
+        "texts_per_sec": len(texts) / elapsed if elapsed > 0 else 0.0,
+        "batch_size": batch_size,
+        "workers": workers if use_pool else 1,
+    })
+    return out
+
+
+def _get_tokenizer():
+    """Private copy of the model's fast tokenizer, without truncation or padding"""
+    global _tokenizer
+    with _lock:
+        if _tokenizer is None:
+            from tokenizers import Tokenizer
+            tok = _get_model().tokenizer
+            tok = getattr(tok, "backend_tokenizer", tok)
+            _tokenizer = Tokenizer.from_str(tok.to_str())
+            _tokenizer.no_truncation()
+            _tokenizer.no_padding()
+        return _tokenizer
+
+
+def token_budget():
+    """Tokens of text the model actually reads, excluding [CLS] and [SEP]"""
+    budget = _get_model().max_seq_length - 2
+    if config.EMBEDDING_MAX_TOKENS > 0:
+        budget = min(budget, config.EMBEDDING_MAX_TOKENS)
+    return budget
+
+
+def budget_texts(texts, max_tokens=None):
+    """
+    Cut each text to roughly max_tokens tokens without tokenizing it
+
+    The cut falls on a word boundary at max_tokens * CHARS_PER_TOKEN
+    characters, slightly past the budget for typical text; the model's own
+    truncation drops the last few tokens, so it never tokenizes the long
+    tail of a description.
+    """
+    limit = (max_tokens or token_budget()) * CHARS_PER_TOKEN
+    out = []
+    for text in texts:
+        if len(text) > limit:
+            cut = text.rfind(" ", limit // 2, limit)
+            text = text[:cut if cut > 0 else limit]
+        out.append(text)
+    return out
+
+
+def split_by_tokens(texts, max_tokens=None, max_chunks=4):
+    """
+    Cut each text into at most max_chunks consecutive windows of max_tokens
+    tokens; anything past the last window is dropped.
+
+    Returns:
+        One list of chunk strings per text
+    """
+    max_tokens = max_tokens or token_budget()
+    keep = max_tokens * max_chunks
+    tok = _get_tokenizer()
+
+    heads = [t[:keep * CHARS_PER_TOKEN] for t in texts]
+    encodings = tok.encode_batch(heads, add_special_tokens=False)
+
+    out = []
+    for text, head, enc in zip(texts, heads, encodings):
+        offsets = enc.offsets
+        if len(head) < len(text) and len(offsets) < keep:
+            # Unusually long tokens; the character cut was too tight
+            offsets = tok.encode(text, add_special_tokens=False).offsets
+        offsets = offsets[:keep]
+        if len(offsets) <= max_tokens:
+            out.append([text[:offsets[-1][1]] if len(offsets) == max_tokens else text])
+            continue
+        out.append([
+            text[offsets[i][0]:offsets[min(i + max_tokens, len(offsets)) - 1][1]]
+            for i in range(0, len(offsets), max_tokens)
+        ])
+    return out
+
+
+def embed_jobs(jobs, chunking=None):
+    """
+    Embed jobs from their canonical text (see utils.text.job_text)
+
+    Texts are cut near the model's token budget before encoding. With chunking
+    (default config.EMBEDDING_CHUNKING), a long description is split into up
+    to EMBEDDING_MAX_CHUNKS windows whose vectors are averaged.
+    """
+    from utils.text import job_text, strip_html_many
+
+    chunking = config.EMBEDDING_CHUNKING if chunking is None else chunking
+    start = time.perf_counter()
+    descriptions = strip_html_many([j.description or "" for j in jobs])
+    texts = [job_text(j, d) for j, d in zip(jobs, descriptions)]
+    if chunking and config.EMBEDDING_MAX_CHUNKS > 1:
+        chunks = split_by_tokens(texts, max_chunks=config.EMBEDDING_MAX_CHUNKS)
+    else:
+        chunks = [[t] for t in budget_texts(texts)]
+    flat = [c for job_chunks in chunks for c in job_chunks]
+    prep_seconds = time.perf_counter() - start
+
+    vecs = embed_cached(flat)
+    if len(flat) > len(texts):
+        counts = np.array([len(c) for c in chunks])
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        vecs = np.add.reduceat(vecs, starts, axis=0) / counts[:, None]
+        vecs /= np.clip(np.linalg.norm(vecs, axis=1, keepdims=True), 1e-12, None)
+        vecs = vecs.astype("float32")
+
+    _last_prep.clear()
+    _last_prep.update({
+        "jobs": len(texts),
+        "chunks": len(flat),
+        "chars_in": sum(len(t) for t in texts),
+        "chars_kept": sum(len(c) for c in flat),
+        "seconds": prep_seconds,
+    })
+    return vecs
+
+
+def text_prep_stats():
+    """Jobs, chunks, characters kept and prep time of the last embed_jobs() call"""
+    return dict(_last_prep)
+
+
+def embedding_stats():
+    """Size, duration and texts/sec of the last embed() call"""
+    return dict(_last_stats)
+
+
+def embed_cached(texts):
+    """
+    Same as embed(), but vectors for previously seen texts come from the
+    on-disk embedding cache and only cache misses are encoded.
+    """
+    _last_stats.clear()  # stays empty when everything is a cache hit
+    cache = embedding_cache(_cache_model_key())
+    if cache is None or not texts:
+        return embed(texts)
+
+    keys = [cache.key(t) for t in texts]
+    vecs, missing = cache.lookup(keys)
+    if not missing:
+        return vecs
+
+    new_vecs = embed([texts[i] for i in missing])
+    cache.add([keys[i] for i in missing], new_vecs)
+    if vecs is None:
+        return new_vecs
+    vecs[missing] = new_vecs
+    return vecs
+
+
+def prep_report(texts):
+    """Print tokenization and encode time for raw texts vs token-budgeted ones"""
+    model = _get_model()
+    tok = _get_tokenizer()
+    tok.encode_batch(texts[:8])  # warm up
+
+    start = time.perf_counter()
+    tok.encode_batch(texts)
+    raw_tok = time.perf_counter() - start
+
+    start = time.perf_counter()
+    trimmed = budget_texts(texts)
+    split_time = time.perf_counter() - start
+    start = time.perf_counter()
+    tok.encode_batch(trimmed)
+    trimmed_tok = time.perf_counter() - start
+
+    embed(texts)
+    raw_embed = embedding_stats()["seconds"]
+    embed(trimmed)
+    trimmed_embed = embedding_stats()["seconds"]
+
+    chars_in, chars_kept = sum(map(len, texts)), sum(map(len, trimmed))
+    print(f"{len(texts)} texts, token budget {token_budget()} of max_seq_length {model.max_seq_length}")
+    print(f"characters kept: {chars_kept}/{chars_in} ({chars_kept / chars_in:.0%})")
+    print(f"tokenize raw texts:           {raw_tok:.3f}s")
+    print(f"tokenize budgeted texts:      {trimmed_tok:.3f}s (+{split_time:.3f}s to cut them)")
+    print(f"embed raw texts:              {raw_embed:.2f}s")
+    print(f"cut + embed budgeted texts:   {split_time + trimmed_embed:.2f}s "
+          f"(saved {raw_embed - split_time - trimmed_embed:.2f}s)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Embedding throughput (texts/sec) by batch size and worker count")
+    ap.add_argument("--texts", type=int, default=2000, help="Number of synthetic job texts")
+    ap.add_argument("--batch-sizes", default="16,32,64,128")
+    ap.add_argument("--workers", default="1,2,4")
+    ap.add_argument("--prep", action="store_true", help="Report tokenization time saved by the token budget instead")
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    words = "python machine learning data engineer remote senior kubernetes aws sql product team".split()
+    if args.prep:
+        # Enriched descriptions run to ~6000 characters, well past the budget
+        prose = ("we are looking for a senior engineer to join our team and help build the data "
+                 "platform you will work with python sql and cloud services on a remote first team").split()
+        texts = [" ".join(rng.choice(prose, size=int(rng.integers(100, 1100)))) for _ in range(args.texts)]
+        prep_report(texts)
+        return
+
+    texts = [" ".join(rng.choice(words, size=int(rng.integers(10, 300)))) for _ in range(args.texts)]
+    config.EMBEDDING_MP_MIN_TEXTS = 0
+
+    print(f"{'workers':>8} {'batch':>6} {'texts/sec':>10}")
+    for workers in (int(w) for w in args.workers.split(",")):
+        # Load the model (and start the worker processes) outside the timings
+        embed(texts[:64], workers=workers)
+        for batch_size in (int(b) for b in args.batch_sizes.split(",")):
+            embed(texts, batch_size=batch_size, workers=workers)
+            print(f"{workers:>8} {batch_size:>6} {embedding_stats()['texts_per_sec']:>10.1f}")
+        _stop_pool()
+
+
+if __name__ == "__main__":
+    main()
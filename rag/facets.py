@@ -0,0 +1,289 @@
+"""
+Facet bitsets for filtered search
+
+FacetIndex keeps one packed bitset (np.packbits layout, one bit per
+JobIndex row) for every value of every facet:
+
+    source    every board the job was seen on (Job.sources, else Job.source)
+    location  each part of the location ("Remote - US" -> remote, us)
+    tag       each tag
+
+Values are case-insensitive. Bitsets combine with & and | directly, and
+filter() gives the common case: any of the listed values within a facet,
+all of the listed facets, e.g.
+
+    {"source": ["RemoteOK", "Remotive"], "location": ["remote"], "tag": ["python"]}
+
+Memory is one bit per row per distinct value, so the rows that pass a
+filter are found without touching the vectors and search then scores only
+those rows.
+
+Like rag.lexical, save() rewrites the full bitsets only occasionally: in
+between, each save appends a small delta file with the (value, row) pairs of
+the rows added since the last one, and the MAX_DELTAS-th delta triggers a
+full rewrite instead.
+"""
+import re
+from pathlib import Path
+
+import numpy as np
+
+FACETS = ("source", "location", "tag")
+MAX_DELTAS = 8  # delta files on disk before save() rewrites the full bitsets
+
+_LOCATION_SPLIT_RE = re.compile(r"\s*(?:[,/|;()]|\s[-–]\s)\s*")
+_LOCATION_ALIASES = {
+    "usa": "us",
+    "u.s.": "us",
+    "united states": "us",
+    "united states of america": "us",
+    "uk": "united kingdom",
+    "anywhere": "worldwide",
+}
+
+
+def normalize(facet, value):
+    value = " ".join(str(value).casefold().split())
+    if facet == "location":
+        value = _LOCATION_ALIASES.get(value, value)
+    return value
+
+
+def facet_values(job):
+    """{facet: set of normalized values} for one job"""
+    location = set()
+    for part in _LOCATION_SPLIT_RE.split(getattr(job, "location", "") or ""):
+        part = normalize("location", part)
+        if part:
+            location.add(part)
+            if "remote" in part:
+                location.add("remote")
+    return {
+        "source": {normalize("source", s) for s in (getattr(job, "sources", None) or [job.source or "Unknown"])},
+        "location": location,
+        "tag": {normalize("tag", t) for t in getattr(job, "tags", None) or [] if t and t.strip()},
+    }
+
+
+def clean_filters(filters):
+    """Drop empty facets and normalize values; unknown facets raise ValueError"""
+    out = {}
+    for facet, values in (filters or {}).items():
+        if facet not in FACETS:
+            raise ValueError(f"Unknown facet {facet!r} (expected one of {', '.join(FACETS)})")
+        if isinstance(values, str):
+            values = [values]
+        values = [normalize(facet, v) for v in values if v and str(v).strip()]
+        if values:
+            out[facet] = values
+    return out
+
+
+def job_matches(job, filters):
+    """Whether a single job passes filters (same rules as FacetIndex.filter)"""
+    filters = clean_filters(filters)
+    if not filters:
+        return True
+    values = facet_values(job)
+    return all(values[facet] & set(wanted) for facet, wanted in filters.items())
+
+
+class FacetIndex:
+    def __init__(self):
+        self.n_rows = 0
+        self.layout = np.zeros((0, 2), dtype=np.int64)  # (segment, rows) built over; set by JobIndex
+        self._values = {f: {} for f in FACETS}                        # value -> row of the bit matrix
+        self._names = {f: [] for f in FACETS}                         # row of the bit matrix -> value
+        self._bits = {f: np.zeros((0, 0), dtype=np.uint8) for f in FACETS}
+        self._saved = None  # (rows, {facet: values}, deltas) as of the last save(); None = rewrite
+
+    def __len__(self):
+        return self.n_rows
+
+    def _n_bytes(self):
+        return (self.n_rows + 7) // 8
+
+    def _value_id(self, facet, value):
+        index = self._values[facet]
+        if value not in index:
+            index[value] = len(index)
+            self._names[facet].append(value)
+        return index[value]
+
+    def _set_bits(self, facet, ids, rows):
+        """Set bits (value id, row) of one facet, growing the bit matrix as needed"""
+        bits = self._bits[facet]
+        n_values, capacity = len(self._values[facet]), bits.shape[1]
+        if n_values > bits.shape[0] or self._n_bytes() > capacity:
+            # Grow columns geometrically so adding rows one batch at a time stays cheap
+            if self._n_bytes() > capacity:
+                capacity = max(self._n_bytes(), 2 * capacity, 64)
+            grown = np.zeros((n_values, capacity), dtype=np.uint8)
+            grown[:bits.shape[0], :bits.shape[1]] = bits
+            bits = self._bits[facet] = grown
+        if len(ids):
+            rows = np.asarray(rows, dtype=np.int64)
+            np.bitwise_or.at(bits, (np.asarray(ids), rows >> 3), (128 >> (rows & 7)).astype(np.uint8))
+
+    def add(self, jobs):
+        """Set the bits of jobs as the next rows"""
+        jobs = list(jobs)
+        start = self.n_rows
+        self.n_rows += len(jobs)
+        pairs = {f: ([], []) for f in FACETS}
+        for row, job in enumerate(jobs, start=start):
+            for facet, values in facet_values(job).items():
+                ids, rows = pairs[facet]
+                for value in values:
+                    ids.append(self._value_id(facet, value))
+                    rows.append(row)
+
+        for facet, (ids, rows) in pairs.items():
+            self._set_bits(facet, ids, rows)
+        return len(jobs)
+
+    def update(self, row, job):
+        """Reset an existing row to the values of job; the next save() rewrites the full bitsets"""
+        byte, bit = row >> 3, np.uint8(128 >> (row & 7))
+        for facet, values in facet_values(job).items():
+            self._bits[facet][:, byte] &= ~bit
+            self._set_bits(facet, [self._value_id(facet, v) for v in values], [row] * len(values))
+        self._saved = None
+
+    def values(self, facet):
+        """{value: number of rows} for a facet, most common first"""
+        index = self._values[facet]
+        if not index:
+            return {}
+        counts = np.unpackbits(self._bits[facet][:, :self._n_bytes()], axis=1).sum(axis=1)
+        return dict(sorted(((v, int(counts[i])) for v, i in index.items()), key=lambda x: -x[1]))
+
+    def bitset(self, facet, value):
+        """Packed bits of the rows having value (all zero for an unseen value)"""
+        i = self._values[facet].get(normalize(facet, value))
+        if i is None:
+            return np.zeros(self._n_bytes(), dtype=np.uint8)
+        return self._bits[facet][i, :self._n_bytes()]
+
+    def any_of(self, facet, values):
+        out = np.zeros(self._n_bytes(), dtype=np.uint8)
+        for value in values:
+            out |= self.bitset(facet, value)
+        return out
+
+    def all_of(self, facet, values):
+        out = np.full(self._n_bytes(), 0xFF, dtype=np.uint8)
+        for value in values:
+            out &= self.bitset(facet, value)
+        return out
+
+    def filter(self, filters):
+        """
+        Rows passing filters, as packed bits
+
+        Args:
+            filters: {facet: values}; a row passes when, for every facet
+                given, it has at least one of the values
+
+        Returns:
+            Packed bits, or None when filters is empty (no filtering)
+        """
+        filters = clean_filters(filters)
+        if not filters:
+            return None
+        out = None
+        for facet, values in filters.items():
+            bits = self.any_of(facet, values)
+            out = bits if out is None else out & bits
+        return out
+
+    def mask(self, bits):
+        """Boolean row mask of packed bits"""
+        return np.unpackbits(bits, count=self.n_rows).view(bool)
+
+    @staticmethod
+    def _delta_paths(path):
+        """Delta files of the index saved at path, in row order"""
+        path = Path(path)
+        return sorted(path.parent.glob(f"{path.stem}-*{path.suffix}"))
+
+    @classmethod
+    def delete(cls, path):
+        """Remove the saved index at path and its delta files"""
+        for p in [Path(path)] + cls._delta_paths(path):
+            p.unlink(missing_ok=True)
+
+    @staticmethod
+    def _write(path, **arrays):
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        tmp.replace(path)
+
+    def _names_bytes(self, facet, start=0):
+        return np.frombuffer("\n".join(self._names[facet][start:]).encode("utf-8"), dtype=np.uint8)
+
+    def save(self, path):
+        """
+        Persist to path (the full bitsets) plus path-NNNNNNNNN delta files
+
+        The full bitsets are rewritten on the first save, after update(), or
+        once MAX_DELTAS deltas exist; otherwise only the rows added since the
+        last save are written.
+        """
+        path = Path(path)
+        if self._saved is None or self._saved[2] >= MAX_DELTAS or not path.exists():
+            arrays = {"n_rows": np.array([self.n_rows], dtype=np.int64), "layout": self.layout}
+            for facet in FACETS:
+                arrays[f"{facet}_values"] = self._names_bytes(facet)
+                arrays[f"{facet}_bits"] = self._bits[facet][:, :self._n_bytes()]
+            self._write(path, **arrays)
+            for delta in self._delta_paths(path):
+                delta.unlink(missing_ok=True)
+            n_deltas = 0
+        elif self.n_rows > self._saved[0]:
+            start, n_values, n_deltas = self._saved
+            arrays = {"n_rows": np.array([self.n_rows], dtype=np.int64), "layout": self.layout}
+            for facet in FACETS:
+                # (value id, row) pairs of the new rows, read back from their columns
+                first = start >> 3
+                ids, rows = np.nonzero(np.unpackbits(self._bits[facet][:, first:self._n_bytes()], axis=1))
+                rows += first << 3
+                keep = (rows >= start) & (rows < self.n_rows)
+                arrays[f"{facet}_values"] = self._names_bytes(facet, n_values[facet])
+                arrays[f"{facet}_ids"] = ids[keep].astype(np.int32)
+                arrays[f"{facet}_rows"] = rows[keep].astype(np.int64)
+            self._write(path.with_name(f"{path.stem}-{start:09d}{path.suffix}"), **arrays)
+            n_deltas += 1
+        else:
+            n_deltas = self._saved[2]
+        self._saved = (self.n_rows, {f: len(self._names[f]) for f in FACETS}, n_deltas)
+
+    @classmethod
+    def load(cls, path):
+        """Load the full bitsets and every delta that continues them; stale deltas are skipped"""
+        index = cls()
+        with np.load(path) as data:
+            index.n_rows = int(data["n_rows"][0])
+            index.layout = data["layout"] if "layout" in data.files else np.zeros((0, 2), dtype=np.int64)
+            for facet in FACETS:
+                values = data[f"{facet}_values"].tobytes().decode("utf-8")
+                index._names[facet] = values.split("\n") if values else []
+                index._values[facet] = {v: i for i, v in enumerate(index._names[facet])}
+                index._bits[facet] = data[f"{facet}_bits"]
+
+        n_deltas = 0
+        for delta in cls._delta_paths(path):
+            if int(delta.stem.rsplit("-", 1)[1]) != index.n_rows:
+                continue  # left over from before the last full save
+            with np.load(delta) as data:
+                index.n_rows = int(data["n_rows"][0])
+                index.layout = data["layout"]
+                for facet in FACETS:
+                    values = data[f"{facet}_values"].tobytes().decode("utf-8")
+                    for value in values.split("\n") if values else []:
+                        index._value_id(facet, value)
+                    index._set_bits(facet, data[f"{facet}_ids"], data[f"{facet}_rows"])
+            n_deltas += 1
+        index._saved = (index.n_rows, {f: len(index._names[f]) for f in FACETS}, n_deltas)
+        return index
@@ -1,68 +1,596 @@
+import argparse
+import json
+import os
+import re
+
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-import pickle
 from pathlib import Path
+
+import config
+from rag.ann import IVFIndex
+from rag.facets import FacetIndex
+from rag.lexical import BM25Index, document_text, reciprocal_rank_fusion
+from rag.quantize import QuantizedVectors
+from rag.schemas import Job
+from storage.job_store import job_fingerprint as _fingerprint
 from storage.paths import STORAGE_DIR
 
-META_FILE = STORAGE_DIR / "meta.pkl"
-VECTORS_FILE = STORAGE_DIR / "vectors.npy"
+INDEX_DIR = STORAGE_DIR / "index"
+SEGMENT_RE = re.compile(r"^seg-(\d{6})\.jsonl$")
+IVF_FILE = "ivf.npz"
+LEXICAL_FILE = "lexical.npz"
+FACET_FILE = "facets.npz"
+INFO_FILE = "index.json"  # embedding model, backend and dimension of the vectors
+SOURCES_FILE = "sources.jsonl"  # Job.sources updates of unchanged rows since the last rewrite
+GATHER_ROWS = 65536  # rows read back from the segments per chunk when scoring a subset
+
 
 class JobIndex:
-    def __init__(self):
-        self.vectors = None
-        self.meta = []
-        
-        # Load existing index if available
-        if META_FILE.exists() and VECTORS_FILE.exists():
+    """
+    Append-only, segmented vector store
+
+    Every add() that brings new or changed jobs writes one new segment
+    (seg-NNNNNN.npy with the vectors, seg-NNNNNN.jsonl with the jobs) and
+    never rewrites older ones. Segments are memory-mapped on load. When a
+    job_id shows up again with different content, the newer row replaces the
+    older one; identical re-adds are skipped. Job.sources is not content: a
+    re-add that only changes it updates the live row in place and appends
+    the new list to sources.jsonl. compact() folds all live rows into a
+    single segment.
+
+    index.json records the embedding model, backend and vector dimension the
+    segments were written with. When they no longer match config (or an add()
+    brings vectors of another dimension), the live jobs are re-embedded into
+    a fresh segment rather than mixed with incompatible vectors.
+
+    Search is brute force by default. With backend="ivf" (or INDEX_BACKEND=ivf)
+    and at least IVF_MIN_ROWS rows, an IVF index from rag.ann narrows each
+    query to the `nprobe` nearest partitions; rows added after the IVF was
+    built are always scored exactly until the next rebuild.
+
+    With storage="float16" or "int8" (INDEX_STORAGE), brute-force scoring runs
+    on a compact in-memory copy from rag.quantize; the float32 segments stay
+    on disk and, when rescore is on, only the top candidates are read back
+    from them and rescored exactly.
+
+    Queries that come with their text can also use the BM25 index from
+    rag.lexical, kept in step with the rows: mode="hybrid" (SEARCH_MODE)
+    fuses the dense and keyword rankings by reciprocal rank, mode="lexical"
+    ranks by keywords alone, and LEXICAL_PREFILTER=N scores vectors only for
+    the N best keyword matches. Returned scores are cosine similarities in
+    every mode.
+
+    search(filters=...) scores only the live rows that pass the filters, using
+    a FacetIndex (rag.facets) of source, location and tag bitsets. add()
+    extends it with the new rows and saves only those as a delta file, so a
+    narrow filter costs a fraction of a full scan from the first query on.
+    """
+
+    def __init__(self, path=None, backend=None, nprobe=None, storage=None, rescore=None, mode=None):
+        self.path = Path(path) if path else INDEX_DIR
+        self.backend = backend or config.INDEX_BACKEND
+        self.nprobe = nprobe or config.IVF_NPROBE
+        self.storage = storage or config.INDEX_STORAGE
+        self.rescore = config.INDEX_RESCORE if rescore is None else rescore
+        self.mode = mode or config.SEARCH_MODE
+        self._ann = None
+        self._lexical = None
+        self._facets = None
+        self._quantized = None
+        self.meta = []              # Job per row, across all segments in order
+        self._segments = []         # (segment number, vectors) in load order
+        self._live = np.zeros(0, dtype=bool)
+        self._rows = {}             # job_id -> (row, fingerprint) of the live version
+        self._matrix_cache = None
+
+        # Load existing segments if available
+        for num, seg_path in self._segment_files():
             try:
-                with open(META_FILE, 'rb') as f:
-                    self.meta = pickle.load(f)
-                self.vectors = np.load(VECTORS_FILE)
+                vectors = np.load(seg_path.with_suffix(".npy"), mmap_mode="r")
+                with open(seg_path, "r", encoding="utf-8") as f:
+                    jobs = [Job.model_validate_json(line) for line in f if line.strip()]
+                if len(jobs) != len(vectors):
+                    raise ValueError(f"{len(jobs)} jobs but {len(vectors)} vectors")
             except Exception as e:
-                print(f"Failed to load index: {e}")
-                self.vectors = None
-                self.meta = []
+                print(f"Failed to load index segment {seg_path.name}: {e}")
+                continue
+            self._append_rows(num, vectors, jobs)
+        self._load_sources()
 
-    def add(self, vectors, jobs):
-        """Add vectors and job metadata to the index"""
-        if self.vectors is None:
-            self.vectors = vectors
-        else:
-            self.vectors = np.vstack([self.vectors, vectors])
-        
+        if self._segments:
+            built_with = self._read_info()
+            current = self._embedding_info(self._dim())
+            if len({v.shape[1] for _, v in self._segments}) > 1:
+                self._reembed("index segments hold vectors of different dimensions")
+            elif built_with is None:
+                # Index from before index.json; assume the current settings
+                self._write_info(current)
+            elif built_with != current:
+                self._reembed(f"index was built with {built_with}, settings are {current}")
+
+    @property
+    def vectors(self):
+        """All rows (live and replaced) as one matrix, or None when empty"""
+        if not self._segments:
+            return None
+        if self._matrix_cache is None:
+            if len(self._segments) == 1:
+                self._matrix_cache = self._segments[0][1]
+            else:
+                self._matrix_cache = np.concatenate([v for _, v in self._segments])
+        return self._matrix_cache
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _segment_files(self):
+        if not self.path.exists():
+            return []
+        found = []
+        for p in self.path.iterdir():
+            m = SEGMENT_RE.match(p.name)
+            if m and p.with_suffix(".npy").exists():
+                found.append((int(m.group(1)), p))
+        return sorted(found)
+
+    def _next_segment_number(self):
+        nums = [num for num, _ in self._segment_files()] + [num for num, _ in self._segments]
+        return max(nums, default=0) + 1
+
+    def _dim(self):
+        return self._segments[-1][1].shape[1] if self._segments else None
+
+    def _embedding_info(self, dim):
+        # The dimension of the newest segment; the model's own is only known once it is loaded
+        return {"model": config.EMBEDDING_MODEL, "backend": config.EMBEDDING_BACKEND, "dim": int(dim)}
+
+    def _read_info(self):
+        try:
+            with open(self.path / INFO_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Failed to read {INFO_FILE}: {e}")
+            return {}
+
+    def _write_info(self, info):
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            tmp = self.path / (INFO_FILE + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(info, f)
+            os.replace(tmp, self.path / INFO_FILE)
+        except Exception as e:
+            print(f"Failed to save {INFO_FILE}: {e}")
+
+    def _load_sources(self):
+        """Apply sources.jsonl to the live rows whose content it was written for"""
+        try:
+            with open(self.path / SOURCES_FILE, "r", encoding="utf-8") as f:
+                updates = [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"Failed to read {SOURCES_FILE}: {e}")
+            return
+        for job_id, fingerprint, sources in updates:
+            current = self._rows.get(job_id)
+            if current is not None and current[1] == fingerprint:
+                self.meta[current[0]] = self.meta[current[0]].model_copy(update={"sources": sources})
+
+    def _reembed(self, reason, skip=()):
+        """Re-embed the live jobs (except job_ids in skip) with the current model into one fresh segment"""
+        from rag.embeddings import embed_jobs
+
+        jobs = [self.meta[i] for i in np.flatnonzero(self._live) if self.meta[i].job_id not in skip]
+        print(f"Warning: {reason}; re-embedding {len(jobs)} indexed jobs")
+        self._rewrite(jobs, embed_jobs(jobs) if jobs else None)
+
+    def _append_rows(self, num, vectors, jobs):
+        start = len(self.meta)
+        self._segments.append((num, vectors))
         self.meta.extend(jobs)
-        
-        # Save to disk
+        self._live = np.concatenate([self._live, np.ones(len(jobs), dtype=bool)])
+        for row, job in enumerate(jobs, start=start):
+            previous = self._rows.get(job.job_id)
+            if previous is not None:
+                self._live[previous[0]] = False
+            self._rows[job.job_id] = (row, _fingerprint(job))
+        self._matrix_cache = None
+
+    def _write_segment(self, num, vectors, jobs):
+        """Write vectors first and the job list last; a segment without its .jsonl is ignored"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        base = self.path / f"seg-{num:06d}"
+        tmp_npy = base.with_suffix(".npy.tmp")
+        tmp_jsonl = base.with_suffix(".jsonl.tmp")
+
+        with open(tmp_npy, "wb") as f:
+            np.save(f, np.ascontiguousarray(vectors, dtype="float32"))
+        os.replace(tmp_npy, base.with_suffix(".npy"))
+
+        with open(tmp_jsonl, "w", encoding="utf-8") as f:
+            for job in jobs:
+                f.write(job.model_dump_json() + "\n")
+        os.replace(tmp_jsonl, base.with_suffix(".jsonl"))
+
+        return np.load(base.with_suffix(".npy"), mmap_mode="r")
+
+    def add(self, vectors, jobs):
+        """Add vectors and job metadata to the index (new or changed jobs only)"""
+        vectors = np.asarray(vectors, dtype="float32")
+        if not jobs:
+            return 0
+
+        # Last occurrence of a job_id within the batch wins
+        latest = {}
+        for i, job in enumerate(jobs):
+            latest[job.job_id] = i
+
+        keep, resourced = [], []
+        for job_id, i in latest.items():
+            current = self._rows.get(job_id)
+            if current is None or current[1] != _fingerprint(jobs[i]):
+                keep.append(i)
+            elif self.meta[current[0]].sources != jobs[i].sources:
+                resourced.append((current[0], jobs[i].sources))
+        keep.sort()
+
+        if resourced:
+            # Same content seen on other boards: no new row, only new source bits
+            facets = self._facet_index()
+            lines = []
+            for row, sources in resourced:
+                job = self.meta[row] = self.meta[row].model_copy(update={"sources": list(sources)})
+                facets.update(row, job)
+                lines.append(json.dumps([job.job_id, self._rows[job.job_id][1], job.sources]) + "\n")
+            try:
+                self.path.mkdir(parents=True, exist_ok=True)
+                with open(self.path / SOURCES_FILE, "a", encoding="utf-8") as f:
+                    f.writelines(lines)
+            except Exception as e:
+                print(f"Failed to save {SOURCES_FILE}: {e}")
+
+        if not keep:
+            if resourced:
+                self._save_facets()
+            return 0
+
+        new_vectors = vectors[keep]
+        new_jobs = [jobs[i] for i in keep]
+        if self._segments and new_vectors.shape[1] != self._dim():
+            self._reembed(
+                f"new vectors have dimension {new_vectors.shape[1]}, the index {self._dim()}",
+                skip={job.job_id for job in new_jobs},
+            )
+        num = self._next_segment_number()
         try:
-            STORAGE_DIR.mkdir(parents=True, exist_ok=True)
-            with open(META_FILE, 'wb') as f:
-                pickle.dump(self.meta, f)
-            np.save(VECTORS_FILE, self.vectors)
+            new_vectors = self._write_segment(num, new_vectors, new_jobs)
         except Exception as e:
             print(f"Failed to save index: {e}")
+        self._append_rows(num, new_vectors, new_jobs)
+        self._write_info(self._embedding_info(new_vectors.shape[1]))
+        self._facet_index()
+        return len(keep)
 
-    def search(self, qvec, top_k: int):
-        """Search for top_k most similar jobs using cosine similarity"""
-        if self.vectors is None or len(self.meta) == 0:
-            return []
-        
-        # Ensure qvec is 2D
+    def compact(self):
+        """Rewrite all live rows into one segment and delete the old segment files"""
+        old_files = self._segment_files()
+        if len(old_files) <= 1 and self._live.all() and not (self.path / SOURCES_FILE).exists():
+            return
+
+        live_rows = np.flatnonzero(self._live)
+        jobs = [self.meta[i] for i in live_rows]
+        self._rewrite(jobs, self._gather(live_rows) if len(live_rows) else None)
+
+    def _rewrite(self, jobs, vectors):
+        """Replace every segment with one holding jobs and vectors"""
+        old_files = self._segment_files()
+        num = self._next_segment_number()
+        if jobs:
+            vectors = self._write_segment(num, vectors, jobs)
+
+        # The new segment has the highest number, so a crash before this loop
+        # still loads correctly: newer rows replace the older copies.
+        for _, seg_path in old_files:
+            seg_path.with_suffix(".npy").unlink(missing_ok=True)
+            seg_path.unlink(missing_ok=True)
+
+        self.meta = []
+        self._segments = []
+        self._live = np.zeros(0, dtype=bool)
+        self._rows = {}
+        self._matrix_cache = None
+        self._quantized = None
+        # Row ids changed, so any saved IVF, lexical or facet index is stale;
+        # sources updates are now part of the new segment
+        self._ann = None
+        self._lexical = None
+        self._facets = None
+        for name in (IVF_FILE, SOURCES_FILE):
+            (self.path / name).unlink(missing_ok=True)
+        BM25Index.delete(self.path / LEXICAL_FILE)
+        FacetIndex.delete(self.path / FACET_FILE)
+        if jobs:
+            self._append_rows(num, vectors, jobs)
+            self._write_info(self._embedding_info(vectors.shape[1]))
+
+    def _layout(self):
+        """(segment number, rows) of each loaded segment, in row order"""
+        return np.array([[num, len(v)] for num, v in self._segments], dtype=np.int64).reshape(-1, 2)
+
+    def _fits_layout(self, side, n_rows, name):
+        """
+        Whether a saved IVF/lexical/facet index was built over a prefix of the
+        loaded segments. A segment that failed to load, or was rewritten,
+        shifts every later row id; such an index is rebuilt instead of used.
+        """
+        layout = np.asarray(side.layout, dtype=np.int64).reshape(-1, 2)
+        current = self._layout()
+        if (
+            len(layout) <= len(current)
+            and np.array_equal(current[:len(layout)], layout)
+            and int(layout[:, 1].sum()) == n_rows
+        ):
+            return True
+        print(f"Warning: {name} does not match the index segments; rebuilding it")
+        return False
+
+    def _segment_starts(self):
+        return np.cumsum([0] + [len(v) for _, v in self._segments])
+
+    def _gather(self, rows):
+        """float32 vectors for the given row ids, read straight from the segments"""
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = self._segment_starts()
+        out = np.empty((len(rows), self._segments[0][1].shape[1]), dtype="float32")
+        seg_of_row = np.searchsorted(starts, rows, side="right") - 1
+        for seg in np.unique(seg_of_row):
+            mask = seg_of_row == seg
+            out[mask] = self._segments[seg][1][rows[mask] - starts[seg]]
+        return out
+
+    def _quantized_vectors(self):
+        """Compact copy of all rows, extended segment by segment as rows are added"""
+        if self._quantized is None:
+            self._quantized = QuantizedVectors(self.storage, config.INDEX_QUANT_SCALE)
+        starts = self._segment_starts()
+        for (_, seg_vectors), start in zip(self._segments, starts):
+            if start + len(seg_vectors) > len(self._quantized):
+                self._quantized.append(seg_vectors[len(self._quantized) - start:])
+        return self._quantized
+
+    def _ann_index(self):
+        """IVF index covering a prefix of the rows, or None to use brute force"""
+        if self.backend != "ivf" or len(self.meta) < config.IVF_MIN_ROWS:
+            return None
+
+        ivf_path = self.path / IVF_FILE
+        if self._ann is None and ivf_path.exists():
+            try:
+                self._ann = IVFIndex.load(ivf_path)
+            except Exception as e:
+                print(f"Failed to load IVF index: {e}")
+            if self._ann is not None and not self._fits_layout(self._ann, self._ann.n_rows, IVF_FILE):
+                self._ann = None
+
+        # Rebuild once the exactly-scored tail gets large relative to the IVF
+        if self._ann is None or len(self.meta) - self._ann.n_rows > 0.25 * self._ann.n_rows:
+            # A one-off matrix for training; not kept, so quantized storage stays compact
+            self._ann = IVFIndex(nprobe=self.nprobe).build(np.concatenate([v for _, v in self._segments]))
+            self._ann.layout = self._layout()
+            try:
+                self.path.mkdir(parents=True, exist_ok=True)
+                self._ann.save(ivf_path)
+            except Exception as e:
+                print(f"Failed to save IVF index: {e}")
+        return self._ann
+
+    def _lexical_index(self):
+        """BM25 index over every row, loaded from disk and extended with rows added since"""
+        lexical_path = self.path / LEXICAL_FILE
+        if self._lexical is None and lexical_path.exists():
+            try:
+                self._lexical = BM25Index.load(lexical_path)
+            except Exception as e:
+                print(f"Failed to load lexical index: {e}")
+            if self._lexical is not None and not self._fits_layout(self._lexical, len(self._lexical), LEXICAL_FILE):
+                self._lexical = None
+        if self._lexical is None:
+            self._lexical = BM25Index()
+
+        if len(self._lexical) < len(self.meta):
+            self._lexical.add(document_text(job) for job in self.meta[len(self._lexical):])
+            self._lexical.layout = self._layout()
+            try:
+                self.path.mkdir(parents=True, exist_ok=True)
+                self._lexical.save(lexical_path)
+            except Exception as e:
+                print(f"Failed to save lexical index: {e}")
+        return self._lexical
+
+    def _facet_index(self):
+        """Facet bitsets over every row, loaded from disk and extended with rows added since"""
+        facet_path = self.path / FACET_FILE
+        if self._facets is None and facet_path.exists():
+            try:
+                self._facets = FacetIndex.load(facet_path)
+            except Exception as e:
+                print(f"Failed to load facet index: {e}")
+            if self._facets is not None and not self._fits_layout(self._facets, len(self._facets), FACET_FILE):
+                self._facets = None
+        if self._facets is None:
+            self._facets = FacetIndex()
+
+        if len(self._facets) < len(self.meta):
+            self._facets.add(self.meta[len(self._facets):])
+            self._save_facets()
+        return self._facets
+
+    def _save_facets(self):
+        self._facets.layout = self._layout()
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._facets.save(self.path / FACET_FILE)
+        except Exception as e:
+            print(f"Failed to save facet index: {e}")
+
+    def search(self, qvec, top_k: int, query_text=None, filters=None):
+        """Search for top_k most similar jobs (dot product of L2-normalized vectors)"""
         if qvec.ndim == 1:
             qvec = qvec.reshape(1, -1)
-        
-        # Compute cosine similarity
-        similarities = cosine_similarity(qvec, self.vectors)[0]
-        
-        # Get top k indices
-        top_k = min(top_k, len(similarities))
-        top_indices = np.argsort(similarities)[::-1][:top_k]
-        
-        # Return (job, score) tuples
+        return self.search_batch(qvec[:1], top_k, None if query_text is None else [query_text], filters)[0]
+
+    def search_batch(self, qvecs, top_k: int, query_texts=None, filters=None):
+        """
+        Score many queries with one matrix multiply
+
+        Args:
+            qvecs: (n_queries, dim) array of L2-normalized query vectors
+            top_k: Results per query
+            query_texts: Optional text of each query, needed for the hybrid and
+                lexical modes and the lexical prefilter (dense search without it)
+            filters: Optional {facet: values} (see rag.facets); only rows with
+                one of the values of every given facet are scored
+
+        Returns:
+            One list of (job, score) tuples per query, best first
+        """
+        qvecs = np.atleast_2d(np.asarray(qvecs, dtype="float32"))
+        allowed = None
+        if filters and self.meta:
+            facets = self._facet_index()
+            bits = facets.filter(filters)
+            if bits is not None:
+                allowed = facets.mask(bits) & self._live
+        top_k = min(top_k, len(self._rows) if allowed is None else int(np.count_nonzero(allowed)))
+        if not self._segments or top_k <= 0:
+            return [[] for _ in range(len(qvecs))]
+
+        if query_texts is None or (self.mode not in ("hybrid", "lexical") and config.LEXICAL_PREFILTER <= 0):
+            if allowed is None:
+                results = self._search_dense(qvecs, top_k)
+            else:
+                results = self._search_rows(qvecs, top_k, np.flatnonzero(allowed))
+        else:
+            results = [self._search_text(q, text, top_k, allowed) for q, text in zip(qvecs, query_texts)]
+        return [
+            [(self.meta[i], float(score)) for i, score in zip(rows, scores)]
+            for rows, scores in results
+        ]
+
+    def _search_dense(self, qvecs, top_k):
+        """(rows, scores) per query, best first"""
+        ann = self._ann_index()
+        if ann is not None:
+            return self._search_ann(ann, qvecs, top_k)
+        if self.storage != "float32":
+            return self._search_quantized(qvecs, top_k)
+
+        # Embeddings are already normalized, so cosine similarity is a dot product
+        scores = qvecs @ self.vectors.T
+        scores[:, ~self._live] = -np.inf
+        return [(row_top, row_scores[row_top]) for row_scores, row_top in zip(scores, _top_k_rows(scores, top_k))]
+
+    def _search_rows(self, qvecs, top_k, rows):
+        """Exact (rows, scores) per query over the given rows only"""
+        scores = np.concatenate(
+            [qvecs @ self._gather(rows[i:i + GATHER_ROWS]).T for i in range(0, len(rows), GATHER_ROWS)], axis=1
+        )
+        return [(rows[top], row_scores[top]) for row_scores, top in zip(scores, _top_k_rows(scores, top_k))]
+
+    def _search_dense_one(self, q, top_k, allowed=None):
+        """Dense (rows, scores) for one query, over the allowed rows only when given"""
+        if allowed is None:
+            return self._search_dense(q[None, :], top_k)[0]
+        return self._search_rows(q[None, :], top_k, np.flatnonzero(allowed))[0]
+
+    def _search_text(self, q, text, top_k, allowed=None):
+        """(rows, scores) for one query whose text is known, per self.mode and LEXICAL_PREFILTER"""
+        hybrid = self.mode == "hybrid"
+        live = self._live if allowed is None else allowed
+        n_live = len(self._rows) if allowed is None else int(np.count_nonzero(allowed))
+        depth = min(max(top_k, config.HYBRID_DEPTH), n_live) if hybrid else top_k
+        prefilter = config.LEXICAL_PREFILTER if n_live > config.LEXICAL_PREFILTER > 0 else 0
+        keyword_rows, _ = self._lexical_index().top(text, max(depth, prefilter), live)
+
+        if self.mode == "lexical":
+            rows = keyword_rows[:top_k]
+            if len(rows) < top_k:
+                # Too few keyword hits (only stop words or unseen terms, say): fill up in dense order
+                dense_rows, _ = self._search_dense_one(q, top_k, allowed)
+                rows = np.concatenate([rows, dense_rows[~np.isin(dense_rows, rows)]])[:top_k]
+            return rows, self._gather(rows) @ q
+
+        if prefilter and len(keyword_rows) >= top_k:
+            # Exact vectors for the best keyword matches only
+            cand = keyword_rows[:prefilter]
+            scores = self._gather(cand) @ q
+            order = np.argsort(-scores, kind="stable")[:depth]
+            dense_rows, dense_scores = cand[order], scores[order]
+        else:
+            dense_rows, dense_scores = self._search_dense_one(q, depth, allowed)
+        if not hybrid:
+            return dense_rows[:top_k], dense_scores[:top_k]
+
+        rows, _ = reciprocal_rank_fusion([dense_rows, keyword_rows[:depth]], config.RRF_K)
+        rows = rows[:top_k]
+        return rows, self._gather(rows) @ q
+
+    def _search_quantized(self, qvecs, top_k):
+        scores = self._quantized_vectors().scores(qvecs)
+        scores[:, ~self._live] = -np.inf
+
+        if not self.rescore:
+            return [(row_top, row_scores[row_top]) for row_scores, row_top in zip(scores, _top_k_rows(scores, top_k))]
+
+        # Shortlist on the compact codes, then rank the shortlist exactly
+        n_cand = min(top_k * config.INDEX_RESCORE_FACTOR, len(self._rows))
         results = []
-        for idx in top_indices:
-            if idx < len(self.meta):
-                job = self.meta[idx]
-                score = float(similarities[idx])
-                results.append((job, score))
-        
-        return results
\ No newline at end of file
+        for q, cand in zip(qvecs, _top_k_rows(scores, n_cand)):
+            exact = self._gather(cand) @ q
+            order = np.argsort(-exact, kind="stable")[:top_k]
+            results.append((cand[order], exact[order]))
+        return results
+
+    def _search_ann(self, ann, qvecs, top_k):
+        tail = np.arange(ann.n_rows, len(self.meta))
+        results = []
+        for q, cand in zip(qvecs, ann.candidates(qvecs, self.nprobe)):
+            cand = np.concatenate([cand, tail])
+            cand = cand[self._live[cand]]
+            if len(cand) == 0:
+                results.append((cand, np.zeros(0, dtype="float32")))
+                continue
+            scores = self._gather(cand) @ q
+            top = _top_k_rows(scores[None, :], min(top_k, len(cand)))[0]
+            results.append((cand[top], scores[top]))
+        return results
+
+
+def _top_k_rows(scores, k):
+    """Indices of the k largest scores in each row, best first, without a full sort"""
+    if k < scores.shape[1]:
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        top = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Maintain the on-disk job index")
+    ap.add_argument("command", choices=["stats", "compact"])
+    ap.add_argument("--path", default=None, help=f"Index directory (default: {INDEX_DIR})")
+    args = ap.parse_args()
+
+    index = JobIndex(args.path)
+    print(f"{len(index)} live jobs, {len(index.meta)} rows in {len(index._segments)} segment(s)")
+    if args.command == "compact":
+        index.compact()
+        print(f"Compacted to {len(index.meta)} rows in {len(index._segments)} segment(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""
+BM25 keyword search for JobIndex
+
+BM25Index is an inverted index over job text that grows with every add().
+Posting lists are stored CSR-style in flat NumPy arrays: for term t, rows
+docs[offsets[t]:offsets[t + 1]] with term frequencies in tfs. New documents
+go to a small append-only tail of (term, row, tf) triples that is merged
+into the flat arrays once it grows past a quarter of them, so adding stays
+cheap and there is never a Python list per term.
+
+save() writes the merged arrays only after a merge; in between, each save
+appends a small delta file with just the rows (and new terms) added since
+the last one, so persisting costs about as much as the batch that was
+added. Once MAX_DELTAS delta files exist, the next save merges the tail
+and rewrites the main file instead, so loading never opens more than a
+handful of files.
+
+Rows are JobIndex row ids. Rows replaced by a newer version of a job keep
+counting towards document frequencies until the index is compacted; search
+takes the live mask so they are never returned.
+"""
+import argparse
+import html
+import re
+import time
+from array import array
+from pathlib import Path
+
+import numpy as np
+
+from utils.text import job_text
+
+# Keeps skill terms such as c++, c#, node.js and k8s whole
+_TOKEN_RE = re.compile(r"\w[\w+#]*(?:\.\w+)*")
+_TAG_RE = re.compile(r"<[^>]*>")
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or our that the their this to "
+    "we will with you your".split()
+)
+MAX_TF = np.iinfo(np.uint16).max
+MAX_DELTAS = 8  # delta files on disk before save() merges them into the main file
+
+
+def tokenize(text):
+    return [t for t in _TOKEN_RE.findall(text.casefold()) if t not in STOP_WORDS]
+
+
+def document_text(job):
+    """Text a job is keyword-indexed by: title, company, location, tags and tag-stripped description"""
+    description = html.unescape(_TAG_RE.sub(" ", job.description or ""))
+    return job_text(job, description=description)
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """
+    Fuse several best-first rankings of row ids
+
+    Each row scores sum(1 / (k + rank)) over the rankings it appears in
+    (rank starting at 1); ties keep the order of first appearance.
+
+    Returns:
+        (rows, scores) arrays, best first
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, row in enumerate(np.asarray(ranking).tolist(), start=1):
+            fused[row] = fused.get(row, 0.0) + 1.0 / (k + rank)
+    rows = sorted(fused, key=fused.get, reverse=True)
+    return np.array(rows, dtype=np.int64), np.array([fused[r] for r in rows])
+
+
+class BM25Index:
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.terms = {}                                 # term -> term id
+        self._vocab = []                                # term id -> term
+        self._offsets = np.zeros(1, dtype=np.int64)     # CSR over the merged postings
+        self._docs = np.zeros(0, dtype=np.int32)
+        self._tfs = np.zeros(0, dtype=np.uint16)
+        self._tail_terms = array("i")                   # postings not merged yet
+        self._tail_docs = array("i")
+        self._tail_tfs = array("H")
+        self._doc_len = array("I")
+        self._merged_rows = 0                           # rows whose postings are in the CSR arrays
+        self._saved = None                              # (merged rows, rows, terms, deltas) as of the last save()
+        self.layout = np.zeros((0, 2), dtype=np.int64)  # (segment, rows) built over; set by JobIndex
+
+    def __len__(self):
+        return len(self._doc_len)
+
+    @property
+    def n_postings(self):
+        return len(self._docs) + len(self._tail_docs)
+
+    def add(self, texts):
+        """Index texts as the next rows; returns the number added"""
+        tokens, lengths = [], []
+        for text in texts:
+            doc = tokenize(text)
+            tokens.extend(doc)
+            lengths.append(len(doc))
+        if not lengths:
+            return 0
+        terms = self.terms
+        for term in set(tokens).difference(terms):
+            terms[term] = len(terms)
+            self._vocab.append(term)
+        term_ids = np.fromiter(map(terms.__getitem__, tokens), dtype=np.int64, count=len(tokens))
+
+        # One (row, term) key per token; unique() gives each posting and its tf, sorted by row
+        start = len(self._doc_len)
+        rows = np.repeat(np.arange(start, start + len(lengths), dtype=np.int64), lengths)
+        keys, tfs = np.unique(rows << 32 | term_ids, return_counts=True)
+        self._tail_docs.frombytes((keys >> 32).astype(np.int32).tobytes())
+        self._tail_terms.frombytes((keys & 0xFFFFFFFF).astype(np.int32).tobytes())
+        self._tail_tfs.frombytes(np.minimum(tfs, MAX_TF).astype(np.uint16).tobytes())
+        self._doc_len.frombytes(np.array(lengths, dtype=np.uint32).tobytes())
+
+        if len(self._tail_docs) > max(1 << 16, len(self._docs) // 4):
+            self._merge()
+        return len(lengths)
+
+    def _merge(self):
+        """Fold the tail into the CSR arrays"""
+        if not len(self._tail_docs):
+            return
+        n_terms = len(self.terms)
+        tail_terms = np.frombuffer(self._tail_terms, dtype=np.int32)
+        old_terms = np.repeat(np.arange(len(self._offsets) - 1, dtype=np.int32), np.diff(self._offsets))
+        terms = np.concatenate([old_terms, tail_terms])
+        # Stable: merged rows come before tail rows, and both are in row order already
+        order = np.argsort(terms, kind="stable")
+        self._docs = np.concatenate([self._docs, np.frombuffer(self._tail_docs, dtype=np.int32)])[order]
+        self._tfs = np.concatenate([self._tfs, np.frombuffer(self._tail_tfs, dtype=np.uint16)])[order]
+        self._offsets = np.concatenate([[0], np.cumsum(np.bincount(terms, minlength=n_terms))]).astype(np.int64)
+        self._tail_terms, self._tail_docs, self._tail_tfs = array("i"), array("i"), array("H")
+        self._merged_rows = len(self._doc_len)
+
+    def _postings(self, term_ids):
+        """(position in term_ids, row, tf) of every posting of the given (sorted) term ids"""
+        idx, docs, tfs = [], [], []
+        n_merged = len(self._offsets) - 1
+        for i, t in enumerate(term_ids):
+            if t < n_merged:
+                lo, hi = self._offsets[t], self._offsets[t + 1]
+                idx.append(np.full(hi - lo, i, dtype=np.int32))
+                docs.append(self._docs[lo:hi])
+                tfs.append(self._tfs[lo:hi])
+        if len(self._tail_docs):
+            tail_terms = np.frombuffer(self._tail_terms, dtype=np.int32)
+            hit = np.flatnonzero(np.isin(tail_terms, term_ids))
+            if len(hit):
+                idx.append(np.searchsorted(term_ids, tail_terms[hit]).astype(np.int32))
+                docs.append(np.frombuffer(self._tail_docs, dtype=np.int32)[hit])
+                tfs.append(np.frombuffer(self._tail_tfs, dtype=np.uint16)[hit])
+        if not docs:
+            empty = np.zeros(0, dtype=np.int32)
+            return empty, empty, np.zeros(0, dtype=np.uint16)
+        return np.concatenate(idx), np.concatenate(docs), np.concatenate(tfs)
+
+    def scores(self, query):
+        """BM25 score of every row for the query text (0 for rows sharing no term)"""
+        n = len(self._doc_len)
+        term_ids = np.array(sorted({self.terms[t] for t in tokenize(query) if t in self.terms}), dtype=np.int32)
+        if n == 0 or len(term_ids) == 0:
+            return np.zeros(n, dtype="float32")
+
+        idx, docs, tfs = self._postings(term_ids)
+        df = np.bincount(idx, minlength=len(term_ids))
+        idf = np.log1p((n - df + 0.5) / (df + 0.5))
+        doc_len = np.frombuffer(self._doc_len, dtype=np.uint32)
+        norm = self.k1 * (1 - self.b + self.b * doc_len[docs] / max(doc_len.mean(), 1.0))
+        tf = tfs.astype("float32")
+        contrib = idf[idx] * tf * (self.k1 + 1) / (tf + norm)
+        return np.bincount(docs, weights=contrib, minlength=n).astype("float32")
+
+    def top(self, query, k, live=None):
+        """
+        Best-matching rows for a query text
+
+        Args:
+            query: Query text
+            k: Maximum number of rows
+            live: Optional boolean mask; rows where it is False are skipped
+
+        Returns:
+            (rows, scores) arrays, best first, only rows with a positive score
+        """
+        scores = self.scores(query)
+        if live is not None:
+            scores[~live[:len(scores)]] = 0
+        rows = np.flatnonzero(scores > 0)
+        if k < len(rows):
+            rows = rows[np.argpartition(-scores[rows], k - 1)[:k]]
+        rows = rows[np.argsort(-scores[rows], kind="stable")]
+        return rows, scores[rows]
+
+    @staticmethod
+    def _delta_paths(path):
+        """Delta files of the index saved at path, in row order"""
+        path = Path(path)
+        return sorted(path.parent.glob(f"{path.stem}-*{path.suffix}"))
+
+    @classmethod
+    def delete(cls, path):
+        """Remove the saved index at path and its delta files"""
+        for p in [Path(path)] + cls._delta_paths(path):
+            p.unlink(missing_ok=True)
+
+    @staticmethod
+    def _write(path, **arrays):
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        tmp.replace(path)
+
+    def _vocab_bytes(self, start, stop=None):
+        return np.frombuffer("\n".join(self._vocab[start:stop]).encode("utf-8"), dtype=np.uint8)
+
+    def save(self, path):
+        """
+        Persist to path (the merged arrays) plus path-NNNNNNNNN delta files
+
+        The merged arrays are rewritten only when they changed since the last
+        save, or when MAX_DELTAS deltas have piled up (the tail is merged
+        first); otherwise only the rows added since then are written.
+        """
+        path = Path(path)
+        if self._saved is not None and self._saved[3] >= MAX_DELTAS and len(self) > self._saved[1]:
+            self._merge()
+        n_merged_terms = len(self._offsets) - 1
+        if self._saved is None or self._saved[0] != self._merged_rows or not path.exists():
+            self._write(
+                path,
+                vocab=self._vocab_bytes(0, n_merged_terms),
+                offsets=self._offsets,
+                docs=self._docs,
+                tfs=self._tfs,
+                doc_len=np.frombuffer(self._doc_len, dtype=np.uint32)[:self._merged_rows],
+                params=np.array([self.k1, self.b]),
+                layout=self.layout,
+            )
+            for delta in self._delta_paths(path):
+                delta.unlink(missing_ok=True)
+            start_row, start_term, n_deltas = self._merged_rows, n_merged_terms, 0
+        else:
+            start_row, start_term, n_deltas = self._saved[1:]
+
+        if len(self) > start_row:
+            tail_docs = np.frombuffer(self._tail_docs, dtype=np.int32)
+            # The tail is in row order, so the new rows' postings are its end
+            first = int(np.searchsorted(tail_docs, start_row))
+            self._write(
+                path.with_name(f"{path.stem}-{start_row:09d}{path.suffix}"),
+                vocab=self._vocab_bytes(start_term),
+                terms=np.frombuffer(self._tail_terms, dtype=np.int32)[first:],
+                docs=tail_docs[first:],
+                tfs=np.frombuffer(self._tail_tfs, dtype=np.uint16)[first:],
+                doc_len=np.frombuffer(self._doc_len, dtype=np.uint32)[start_row:],
+                layout=self.layout,
+            )
+            n_deltas += 1
+        self._saved = (self._merged_rows, len(self), len(self.terms), n_deltas)
+
+    @classmethod
+    def load(cls, path):
+        """Load the merged arrays and every delta that continues them; stale deltas are skipped"""
+        with np.load(path) as data:
+            k1, b = (float(x) for x in data["params"])
+            index = cls(k1=k1, b=b)
+            vocab = data["vocab"].tobytes().decode("utf-8")
+            index._vocab = vocab.split("\n") if vocab else []
+            index.terms = {t: i for i, t in enumerate(index._vocab)}
+            index._offsets = data["offsets"]
+            index._docs = data["docs"]
+            index._tfs = data["tfs"]
+            index._doc_len = array("I", data["doc_len"].astype(np.uint32).tobytes())
+            index.layout = data["layout"] if "layout" in data.files else np.zeros((0, 2), dtype=np.int64)
+        index._merged_rows = len(index._doc_len)
+
+        n_deltas = 0
+        for delta in cls._delta_paths(path):
+            if int(delta.stem.rsplit("-", 1)[1]) != len(index):
+                continue  # left over from before the last merge
+            with np.load(delta) as data:
+                vocab = data["vocab"].tobytes().decode("utf-8")
+                for term in vocab.split("\n") if vocab else []:
+                    index.terms[term] = len(index.terms)
+                    index._vocab.append(term)
+                index._tail_terms.frombytes(data["terms"].astype(np.int32).tobytes())
+                index._tail_docs.frombytes(data["docs"].astype(np.int32).tobytes())
+                index._tail_tfs.frombytes(data["tfs"].astype(np.uint16).tobytes())
+                index._doc_len.frombytes(data["doc_len"].astype(np.uint32).tobytes())
+                index.layout = data["layout"] if "layout" in data.files else index.layout
+            n_deltas += 1
+        index._saved = (index._merged_rows, len(index), len(index.terms), n_deltas)
+        return index
+
+
+def main():
+    from rag.embeddings import embed
+    from rag.index import JobIndex
+
+    ap = argparse.ArgumentParser(description="Build time, size and prefilter recall of the BM25 index")
+    ap.add_argument("--path", default=None, help="Index directory (default: storage/index)")
+    ap.add_argument("--queries", type=int, default=50, help="Number of stored jobs to use as queries")
+    ap.add_argument("--top-k", type=int, default=10)
+    ap.add_argument("--candidates", default="100,500,2000", help="Prefilter sizes to report")
+    args = ap.parse_args()
+
+    index = JobIndex(args.path)
+    live = np.flatnonzero(index._live)
+    if len(live) == 0:
+        print("Index is empty")
+        return
+
+    start = time.perf_counter()
+    bm25 = BM25Index()
+    bm25.add(document_text(job) for job in index.meta)
+    bm25._merge()
+    build = time.perf_counter() - start
+    size = bm25._offsets.nbytes + bm25._docs.nbytes + bm25._tfs.nbytes + len(bm25._doc_len) * 4
+    print(f"Indexed {len(bm25)} rows, {len(bm25.terms)} terms, {bm25.n_postings} postings "
+          f"({size / 1e6:.1f} MB) in {build:.2f}s")
+
+    rng = np.random.default_rng(0)
+    rows = live[rng.choice(len(live), size=min(args.queries, len(live)), replace=False)]
+    queries = [index.meta[r].title + " " + " ".join(index.meta[r].tags) for r in rows]
+    qvecs = embed(queries)
+    k = min(args.top_k, len(live))
+
+    start = time.perf_counter()
+    ranked = [bm25.top(q, max(int(c) for c in args.candidates.split(",")), index._live)[0] for q in queries]
+    ms = (time.perf_counter() - start) * 1000 / len(queries)
+    print(f"BM25 query: {ms:.2f} ms")
+
+    vectors = np.asarray(index.vectors, dtype="float32")
+    exact = []
+    for q in qvecs:
+        scores = vectors @ q
+        scores[~index._live] = -np.inf
+        exact.append(set(np.argpartition(-scores, k - 1)[:k].tolist()))
+    print(f"{'candidates':>10} {'dense recall@' + str(k):>16}")
+    for n_cand in (int(c) for c in args.candidates.split(",")):
+        recall = []
+        for q, cand, truth in zip(qvecs, ranked, exact):
+            cand = cand[:n_cand]
+            found = cand[np.argsort(-(vectors[cand] @ q))[:k]] if len(cand) else cand
+            recall.append(len(truth & set(found.tolist())) / k)
+        print(f"{n_cand:>10} {np.mean(recall):>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+ONNX Runtime backend for sentence embeddings
+
+Runs the transformer of a sentence-transformers model (all-MiniLM-L6-v2 by
+default) as an exported ONNX graph, with mean pooling and L2 normalization
+done in NumPy, so encoding needs neither torch nor sentence_transformers at
+runtime. The "onnx-int8" variant additionally applies dynamic int8
+quantization to the weights.
+
+The export runs once per model (it does need torch and sentence_transformers)
+and is kept in config.ONNX_DIR. Vectors stay within COSINE_TOLERANCE of the
+PyTorch ones; compare speed and agreement with:
+
+    python -m rag.onnx_backend --texts 1000
+"""
+import argparse
+import inspect
+import json
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+
+import config
+
+BACKENDS = ("onnx", "onnx-int8")
+
+# Minimum cosine similarity to the PyTorch vector of the same text is
+# 1 - COSINE_TOLERANCE[backend]. fp32 ONNX only differs by float rounding;
+# int8 weights cost a little more (typically ~0.99+ for MiniLM).
+COSINE_TOLERANCE = {"onnx": 1e-4, "onnx-int8": 0.03}
+
+INPUT_NAMES = ("input_ids", "attention_mask", "token_type_ids")
+
+
+def _export_dir(model_name):
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name).strip("_")
+    return Path(config.ONNX_DIR) / slug
+
+
+def export_model(model_name, out_dir):
+    """
+    Export a sentence-transformers model to ONNX
+
+    Only Transformer + mean Pooling (+ Normalize) pipelines are supported,
+    which covers the MiniLM family used here.
+
+    Args:
+        model_name: Hub id or local path of the sentence-transformers model
+        out_dir: Directory for model.onnx, tokenizer.json and meta.json
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer, models
+
+    st = SentenceTransformer(model_name, device="cpu")
+    modules = list(st)
+    transformer, pooling = modules[0], modules[1] if len(modules) > 1 else None
+    if (
+        not isinstance(transformer, models.Transformer)
+        or not isinstance(pooling, models.Pooling)
+        or pooling.get_pooling_mode_str() != "mean"
+        or not all(isinstance(m, models.Normalize) for m in modules[2:])
+    ):
+        raise ValueError(f"ONNX backend only supports Transformer + mean Pooling models, not {model_name}")
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    tokenizer = transformer.tokenizer
+    tokenizer.save_pretrained(str(out_dir))
+    if not (out_dir / "tokenizer.json").exists():
+        raise ValueError(f"{model_name} has no fast tokenizer; cannot use the ONNX backend")
+
+    sample = tokenizer(["an example job posting"], return_tensors="pt")
+    input_names = [name for name in INPUT_NAMES if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "seq"} for name in input_names + ["token_embeddings"]}
+    kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        kwargs["dynamo"] = False  # the TorchScript exporter handles dynamic axes without onnxscript
+
+    model = transformer.auto_model.eval()
+    tmp_path = out_dir / "model.onnx.tmp"
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            str(tmp_path),
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+            **kwargs,
+        )
+    tmp_path.replace(out_dir / "model.onnx")
+
+    meta = {
+        "model": model_name,
+        "input_names": input_names,
+        "max_seq_length": st.max_seq_length,
+        "do_lower_case": bool(getattr(transformer, "do_lower_case", False)),
+        "dimension": st.get_sentence_embedding_dimension(),
+    }
+    (out_dir / "meta.json").write_text(json.dumps(meta, indent=2))
+
+
+def quantize_model(out_dir):
+    """Write model.int8.onnx next to model.onnx (dynamic int8 weights)"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    out_dir = Path(out_dir)
+    tmp_path = out_dir / "model.int8.onnx.tmp"
+    quantize_dynamic(str(out_dir / "model.onnx"), str(tmp_path), weight_type=QuantType.QInt8)
+    tmp_path.replace(out_dir / "model.int8.onnx")
+
+
+class OnnxEmbedder:
+    """
+    Drop-in for the parts of SentenceTransformer that embed() uses:
+    encode() and get_sentence_embedding_dimension().
+    """
+
+    def __init__(self, model_name, quantize=False, export_dir=None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_name = model_name
+        self.dir = Path(export_dir) if export_dir else _export_dir(model_name)
+        if not (self.dir / "meta.json").exists():
+            print(f"Exporting {model_name} to ONNX in {self.dir} (one-time)...")
+            export_model(model_name, self.dir)
+        model_file = self.dir / "model.onnx"
+        if quantize:
+            model_file = self.dir / "model.int8.onnx"
+            if not model_file.exists():
+                quantize_model(self.dir)
+
+        self.meta = json.loads((self.dir / "meta.json").read_text())
+        self.tokenizer = Tokenizer.from_file(str(self.dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.meta["max_seq_length"])
+        pad_token = self.tokenizer.padding["pad_token"] if self.tokenizer.padding else "[PAD]"
+        self.tokenizer.enable_padding(pad_id=self.tokenizer.token_to_id(pad_token) or 0, pad_token=pad_token)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(model_file), options, providers=["CPUExecutionProvider"])
+
+    @property
+    def max_seq_length(self):
+        return self.meta["max_seq_length"]
+
+    def get_sentence_embedding_dimension(self):
+        return self.meta["dimension"]
+
+    def _encode_batch(self, texts):
+        texts = [str(t).strip() for t in texts]
+        if self.meta["do_lower_case"]:
+            texts = [t.lower() for t in texts]
+        encodings = self.tokenizer.encode_batch(texts)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        feeds = {name: feeds[name] for name in self.meta["input_names"]}
+        tokens = self.session.run(None, feeds)[0]
+
+        # Mean pooling over real (non-padding) tokens, as sentence-transformers does
+        mask = feeds["attention_mask"][..., None].astype(np.float32)
+        summed = (tokens * mask).sum(axis=1)
+        return summed / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def encode(self, texts, batch_size=64, normalize_embeddings=True):
+        """
+        Embed texts in batches
+
+        Returns:
+            float32 array of shape (len(texts), dimension)
+        """
+        texts = list(texts)
+        out = np.empty((len(texts), self.get_sentence_embedding_dimension()), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            out[start:start + batch_size] = self._encode_batch(texts[start:start + batch_size])
+        if normalize_embeddings:
+            out /= np.clip(np.linalg.norm(out, axis=1, keepdims=True), 1e-12, None)
+        return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare the ONNX embedding backends with PyTorch")
+    ap.add_argument("--texts", type=int, default=1000, help="Number of synthetic job texts")
+    ap.add_argument("--batch-size", type=int, default=config.EMBEDDING_BATCH_SIZE)
+    ap.add_argument("--model", default=config.EMBEDDING_MODEL)
+    args = ap.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+
+    rng = np.random.default_rng(0)
+    words = "python machine learning data engineer remote senior kubernetes aws sql product team".split()
+    texts = [" ".join(rng.choice(words, size=int(rng.integers(10, 300)))) for _ in range(args.texts)]
+    # Same longest-first order embed() uses, so padding waste is comparable
+    texts.sort(key=len, reverse=True)
+
+    backends = {"torch": lambda: SentenceTransformer(args.model, device="cpu")}
+    backends["onnx"] = lambda: OnnxEmbedder(args.model)
+    backends["onnx-int8"] = lambda: OnnxEmbedder(args.model, quantize=True)
+
+    reference = None
+    print(f"{'backend':>10} {'load s':>7} {'texts/sec':>10} {'min cos':>8} {'mean cos':>9}  within tolerance")
+    for name, load in backends.items():
+        start = time.perf_counter()
+        model = load()
+        model.encode(texts[:8], batch_size=8)
+        load_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        vecs = np.asarray(model.encode(texts, batch_size=args.batch_size, normalize_embeddings=True), dtype=np.float32)
+        rate = len(texts) / (time.perf_counter() - start)
+
+        if reference is None:
+            reference = vecs
+            print(f"{name:>10} {load_time:>7.2f} {rate:>10.1f} {'-':>8} {'-':>9}  (reference)")
+            continue
+        cos = (vecs * reference).sum(axis=1)
+        ok = cos.min() >= 1 - COSINE_TOLERANCE[name]
+        print(f"{name:>10} {load_time:>7.2f} {rate:>10.1f} {cos.min():>8.5f} {cos.mean():>9.5f}  {'yes' if ok else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
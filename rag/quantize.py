@@ -0,0 +1,145 @@
+"""
+Compact in-memory vector storage for JobIndex
+
+QuantizedVectors keeps embeddings as float16, or as int8 with a float32
+scale per vector or per dimension, and scores queries against the codes a
+block at a time so the full float32 matrix is never materialised.
+"""
+import argparse
+
+import numpy as np
+
+MODES = ("float32", "float16", "int8")
+BLOCK_ROWS = 16384
+
+
+class QuantizedVectors:
+    def __init__(self, mode="int8", per="vector"):
+        """
+        Args:
+            mode: "float16" or "int8"
+            per: int8 scale granularity, "vector" or "dimension"
+        """
+        if mode not in ("float16", "int8"):
+            raise ValueError(f"Unknown quantization mode '{mode}'")
+        if per not in ("vector", "dimension"):
+            raise ValueError(f"Unknown scale granularity '{per}'")
+        self.mode = mode
+        self.per = per
+        self.codes = None
+        self.scales = None
+
+    def __len__(self):
+        return 0 if self.codes is None else len(self.codes)
+
+    @property
+    def nbytes(self):
+        if self.codes is None:
+            return 0
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def append(self, vectors):
+        """Quantize and append rows (per-dimension scales are fixed by the first batch)"""
+        vectors = np.asarray(vectors, dtype="float32")
+        if self.mode == "float16":
+            codes, scales = vectors.astype("float16"), None
+        elif self.per == "vector":
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype("int8")
+        else:
+            if self.scales is None:
+                dim_scales = np.abs(vectors).max(axis=0) / 127.0
+                dim_scales[dim_scales == 0] = 1.0
+                self.scales = dim_scales.astype("float32")
+            codes = np.clip(np.rint(vectors / self.scales), -127, 127).astype("int8")
+            scales = None
+
+        if self.codes is None:
+            self.codes = codes
+            if scales is not None:
+                self.scales = scales.astype("float32")
+        else:
+            self.codes = np.concatenate([self.codes, codes])
+            if scales is not None:
+                self.scales = np.concatenate([self.scales, scales.astype("float32")])
+        return self
+
+    def scores(self, qvecs):
+        """(n_queries, n_rows) approximate dot products, computed block by block"""
+        qvecs = np.atleast_2d(np.asarray(qvecs, dtype="float32"))
+        if self.mode == "int8" and self.per == "dimension":
+            # Fold the per-dimension scales into the queries once
+            qvecs = qvecs * self.scales
+        out = np.empty((len(qvecs), len(self)), dtype="float32")
+        for start in range(0, len(self), BLOCK_ROWS):
+            block = self.codes[start:start + BLOCK_ROWS].astype("float32")
+            out[:, start:start + BLOCK_ROWS] = qvecs @ block.T
+        if self.mode == "int8" and self.per == "vector":
+            out *= self.scales
+        return out
+
+
+def quantization_report(vectors, qvecs, top_k=10, rescore_factor=4):
+    """
+    Compare each compact storage mode with float32 brute force
+
+    Returns:
+        List of dicts: mode, bytes, savings (x smaller than float32), and
+        overlap@k with the float32 ranking both without and with exact
+        rescoring of the top (top_k * rescore_factor) candidates
+    """
+    vectors = np.asarray(vectors, dtype="float32")
+    qvecs = np.atleast_2d(np.asarray(qvecs, dtype="float32"))
+    k = min(top_k, len(vectors))
+    exact_scores = qvecs @ vectors.T
+    exact = [set(np.argpartition(-row, k - 1)[:k].tolist()) for row in exact_scores]
+
+    report = [{"mode": "float32", "bytes": vectors.nbytes, "savings": 1.0, "overlap": 1.0, "overlap_rescored": 1.0}]
+    for mode, per in (("float16", "vector"), ("int8", "vector"), ("int8", "dimension")):
+        qv = QuantizedVectors(mode, per).append(vectors)
+        approx = qv.scores(qvecs)
+        n_cand = min(len(vectors), k * rescore_factor)
+        overlap, overlap_rescored = [], []
+        for q, row, truth in zip(qvecs, approx, exact):
+            cand = np.argpartition(-row, n_cand - 1)[:n_cand]
+            top = cand[np.argsort(-row[cand])[:k]]
+            rescored = cand[np.argsort(-(vectors[cand] @ q))[:k]]
+            overlap.append(len(truth & set(top.tolist())) / k)
+            overlap_rescored.append(len(truth & set(rescored.tolist())) / k)
+        report.append({
+            "mode": mode if mode == "float16" else f"int8/{per}",
+            "bytes": qv.nbytes,
+            "savings": vectors.nbytes / qv.nbytes,
+            "overlap": float(np.mean(overlap)),
+            "overlap_rescored": float(np.mean(overlap_rescored)),
+        })
+    return report
+
+
+def main():
+    from rag.index import JobIndex
+
+    ap = argparse.ArgumentParser(description="Memory and ranking agreement of quantized storage vs float32")
+    ap.add_argument("--path", default=None, help="Index directory (default: storage/index)")
+    ap.add_argument("--queries", type=int, default=200, help="Number of stored jobs to use as queries")
+    ap.add_argument("--top-k", type=int, default=10)
+    args = ap.parse_args()
+
+    index = JobIndex(args.path)
+    live = np.flatnonzero(index._live)
+    if len(live) == 0:
+        print("Index is empty")
+        return
+    vectors = np.asarray(index.vectors[live], dtype="float32")
+    rng = np.random.default_rng(0)
+    queries = vectors[rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)]
+
+    print(f"{'mode':>15} {'MB':>8} {'savings':>8} {'overlap@' + str(args.top_k):>11} {'rescored':>9}")
+    for row in quantization_report(vectors, queries, args.top_k):
+        print(f"{row['mode']:>15} {row['bytes'] / 1e6:>8.2f} {row['savings']:>7.1f}x "
+              f"{row['overlap']:>11.3f} {row['overlap_rescored']:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ class Job(BaseModel):
     tags: List[str]
     url: str
     source: Optional[str] = "Unknown"
+    sources: List[str] = []  # every board a near-duplicate of this posting was seen on
 
 class JobMatch(BaseModel):
     job: Job
@@ -0,0 +1,307 @@
+"""
+Disk-backed caches stored under config.CACHE_DIR
+
+DiskCache is a small SQLite database in WAL mode, so several processes
+(e.g. the CLI and the Streamlit app) can read and write the same cache
+safely. Entries expire after a TTL and the least recently used entries are
+evicted once the cache grows past its entry limit.
+
+EmbeddingCache is an append-only file of fixed-size (key, vector) records
+so embeddings can be looked up in bulk without re-encoding unchanged text.
+"""
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+import config
+
+try:
+    import fcntl  # POSIX only; appends are still record-atomic without it
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+
+class DiskCache:
+    def __init__(self, path, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        """
+        Args:
+            path: SQLite file to store entries in
+            ttl: Seconds an entry stays valid (None = forever)
+            max_entries: LRU bound on the number of entries (None = unbounded)
+        """
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed)")
+        self._conn.commit()
+
+    def _oldest_valid(self, now):
+        return now - self.ttl if self.ttl else 0.0
+
+    def get(self, key: str) -> Optional[str]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Return {key: value} for every key that is cached and not expired"""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+
+        now = time.time()
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM entries WHERE created >= ? "
+                    f"AND key IN ({','.join('?' * len(chunk))})",
+                    [self._oldest_valid(now), *chunk],
+                ).fetchall()
+                found.update(rows)
+            if found:
+                self._conn.executemany(
+                    "UPDATE entries SET accessed = ? WHERE key = ?",
+                    [(now, k) for k in found],
+                )
+                self._conn.commit()
+        return found
+
+    def set(self, key: str, value: str):
+        self.set_many({key: value})
+
+    def set_many(self, items: Dict[str, str]):
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                [(k, v, now, now) for k, v in items.items()],
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def _evict(self, now):
+        """Drop expired entries, then the least recently used ones over the limit"""
+        if self.ttl:
+            self._conn.execute("DELETE FROM entries WHERE created < ?", (self._oldest_valid(now),))
+        if self.max_entries:
+            excess = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM entries WHERE key IN "
+                    "(SELECT key FROM entries ORDER BY accessed ASC LIMIT ?)",
+                    (excess,),
+                )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class EmbeddingCache:
+    """
+    Content-hash -> embedding vector store for one embedding model
+
+    File layout: a 16-byte header (magic + vector dim) followed by records of
+    a 16-byte blake2b digest of "<model>\\0<text>" and the float32 vector.
+    Records are only ever appended, so other processes' writes are picked up
+    by reading the new tail of the file.
+    """
+    MAGIC = b"JSEMB001"
+    HEADER_SIZE = 16
+
+    def __init__(self, path, model_name: str):
+        self.path = Path(path)
+        self.model_name = model_name
+        self._lock = threading.Lock()
+        self._dim = None
+        self._records = 0
+        self._index: Dict[bytes, int] = {}
+        self._vectors = np.empty((0, 0), dtype="float32")
+
+    def key(self, text: str) -> bytes:
+        return hashlib.blake2b(f"{self.model_name}\0{text}".encode("utf-8"), digest_size=16).digest()
+
+    def _dtype(self):
+        return np.dtype([("key", "V16"), ("vec", "<f4", (self._dim,))])
+
+    def _refresh(self):
+        """Load records appended since the last read (by us or another process)"""
+        if not self.path.exists():
+            return
+        with open(self.path, "rb") as f:
+            if self._dim is None:
+                header = f.read(self.HEADER_SIZE)
+                if len(header) < self.HEADER_SIZE or header[:8] != self.MAGIC:
+                    return
+                self._dim = int(np.frombuffer(header[8:12], dtype="<u4")[0])
+                self._vectors = np.empty((0, self._dim), dtype="float32")
+
+            dtype = self._dtype()
+            f.seek(0, 2)
+            # A torn trailing record (crash mid-append) is simply ignored
+            available = (f.tell() - self.HEADER_SIZE) // dtype.itemsize
+            if available <= self._records:
+                return
+            f.seek(self.HEADER_SIZE + self._records * dtype.itemsize)
+            recs = np.fromfile(f, dtype=dtype, count=available - self._records)
+
+        for i, k in enumerate(recs["key"], start=self._records):
+            self._index[k.tobytes()] = i
+        self._vectors = np.concatenate([self._vectors, recs["vec"]])
+        self._records += len(recs)
+
+    def lookup(self, keys: List[bytes]) -> Tuple[Optional[np.ndarray], List[int]]:
+        """
+        Returns:
+            (vectors, missing) where vectors is an (n, dim) array with the
+            cached rows filled in (None if nothing is cached yet) and missing
+            lists the positions that still need encoding
+        """
+        with self._lock:
+            self._refresh()
+            if self._dim is None:
+                return None, list(range(len(keys)))
+            rows = np.fromiter((self._index.get(k, -1) for k in keys), dtype=np.int64, count=len(keys))
+
+        hit = rows >= 0
+        out = np.empty((len(keys), self._dim), dtype="float32")
+        out[hit] = self._vectors[rows[hit]]
+        return out, np.flatnonzero(~hit).tolist()
+
+    def add(self, keys: List[bytes], vectors: np.ndarray):
+        vectors = np.asarray(vectors, dtype="float32")
+        if not len(keys):
+            return
+
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "ab") as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    if f.tell() == 0:
+                        f.write(self.MAGIC + np.array([vectors.shape[1], 0], dtype="<u4").tobytes())
+                        f.flush()
+                    self._refresh()
+
+                    recs = np.empty(len(keys), dtype=self._dtype())
+                    recs["key"] = np.array(keys, dtype="V16")
+                    recs["vec"] = vectors
+                    f.write(recs.tobytes())
+                    f.flush()
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+
+            for i, k in enumerate(keys, start=self._records):
+                self._index[k] = i
+            self._vectors = np.concatenate([self._vectors, vectors])
+            self._records += len(keys)
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self._index)
+
+
+_caches: Dict[str, DiskCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name: str, ttl: Optional[float] = None, max_entries: Optional[int] = None) -> Optional[DiskCache]:
+    """
+    Shared cache instance stored at CACHE_DIR/<name>.sqlite
+
+    Returns None when caching is disabled (ENABLE_CACHING=false), so callers
+    can simply skip the cache.
+    """
+    if not config.ENABLE_CACHING:
+        return None
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = DiskCache(config.CACHE_DIR / f"{name}.sqlite", ttl=ttl, max_entries=max_entries)
+        return _caches[name]
+
+
+def description_cache() -> Optional[DiskCache]:
+    """URL -> extracted job description text"""
+    return get_cache(
+        "descriptions",
+        ttl=config.DESCRIPTION_CACHE_TTL,
+        max_entries=config.DESCRIPTION_CACHE_MAX_ENTRIES,
+    )
+
+
+def feed_cache() -> Optional[DiskCache]:
+    """Feed/API URL -> validators and last parsed payload (jobs/conditional.py)"""
+    return get_cache(
+        "feeds",
+        ttl=config.FEED_CACHE_TTL,
+        max_entries=config.FEED_CACHE_MAX_ENTRIES,
+    )
+
+
+def llm_cache() -> Optional[DiskCache]:
+    """Prompt hash -> LLM completion (utils/llm.py)"""
+    if not config.ENABLE_LLM_CACHE:
+        return None
+    return get_cache(
+        "llm",
+        ttl=config.LLM_CACHE_TTL,
+        max_entries=config.LLM_CACHE_MAX_ENTRIES,
+    )
+
+
+def plan_cache() -> Optional[DiskCache]:
+    """Resume + intent hash -> LLM planner decision (agents/planner_agent.py)"""
+    return get_cache("plans", ttl=config.LLM_CACHE_TTL, max_entries=config.LLM_CACHE_MAX_ENTRIES)
+
+
+_embedding_caches: Dict[str, EmbeddingCache] = {}
+
+
+def embedding_cache(model_name: str) -> Optional[EmbeddingCache]:
+    """Shared embedding cache for model_name (None when caching is disabled)"""
+    if not config.ENABLE_CACHING:
+        return None
+    with _caches_lock:
+        if model_name not in _embedding_caches:
+            slug = re.sub(r"[^A-Za-z0-9]+", "-", model_name).strip("-")
+            _embedding_caches[model_name] = EmbeddingCache(config.CACHE_DIR / f"embeddings-{slug}.bin", model_name)
+        return _embedding_caches[model_name]
@@ -0,0 +1,192 @@
+"""
+Persistent SQLite store of normalized job postings
+
+Each row keeps the posting as the source served it (and a fingerprint of
+that content), the current description (which enrichment may have
+replaced), and first-seen / last-seen timestamps. sync() upserts a fresh
+fetch and reports which postings are new or changed, so only those need
+enrichment and re-embedding; load() serves matching with no network.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional, Set, Tuple
+
+import config
+from rag.schemas import Job
+
+
+def job_fingerprint(job: Job) -> str:
+    """Hash of the posting content as fetched from its source"""
+    payload = json.dumps(
+        [job.title, job.company, job.location, job.description, job.tags, job.url, job.source],
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class JobStore:
+    def __init__(self, path=None):
+        self.path = Path(path) if path else config.JOB_STORE_PATH
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " job_id TEXT PRIMARY KEY,"
+            " source TEXT,"
+            " title TEXT NOT NULL,"
+            " company TEXT NOT NULL,"
+            " location TEXT NOT NULL,"
+            " description TEXT NOT NULL,"
+            " source_description TEXT NOT NULL,"
+            " tags TEXT NOT NULL,"
+            " sources TEXT NOT NULL DEFAULT '[]',"
+            " url TEXT NOT NULL,"
+            " fingerprint TEXT NOT NULL,"
+            " first_seen REAL NOT NULL,"
+            " last_seen REAL NOT NULL,"
+            " updated REAL NOT NULL)"
+        )
+        columns = {r[1] for r in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "sources" not in columns:
+            # Stores created before Job.sources was kept
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN sources TEXT NOT NULL DEFAULT '[]'")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_source_seen ON jobs(source, last_seen)")
+        self._conn.commit()
+
+    @staticmethod
+    def _row_to_job(row) -> Job:
+        job_id, source, title, company, location, description, tags, url, sources = row
+        return Job(
+            job_id=job_id,
+            title=title,
+            company=company,
+            location=location,
+            description=description,
+            tags=json.loads(tags),
+            url=url,
+            source=source,
+            sources=json.loads(sources),
+        )
+
+    def sync(self, jobs: Iterable[Job]) -> Tuple[List[Job], Set[str]]:
+        """
+        Upsert freshly fetched jobs
+
+        Returns:
+            (jobs, changed_ids): the jobs to use downstream (unchanged ones
+            carry their stored, possibly enriched, description) and the ids
+            of postings that are new or whose content changed
+        """
+        now = time.time()
+        out, changed = [], set()
+        with self._lock:
+            for job in jobs:
+                fp = job_fingerprint(job)
+                row = self._conn.execute(
+                    "SELECT fingerprint, description FROM jobs WHERE job_id = ?", (job.job_id,)
+                ).fetchone()
+
+                if row is None:
+                    self._conn.execute(
+                        "INSERT INTO jobs (job_id, source, title, company, location, description,"
+                        " source_description, tags, sources, url, fingerprint, first_seen, last_seen, updated)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (job.job_id, job.source, job.title, job.company, job.location,
+                         job.description, job.description, json.dumps(job.tags), json.dumps(job.sources),
+                         job.url, fp, now, now, now),
+                    )
+                    changed.add(job.job_id)
+                elif row[0] != fp:
+                    self._conn.execute(
+                        "UPDATE jobs SET source = ?, title = ?, company = ?, location = ?, description = ?,"
+                        " source_description = ?, tags = ?, sources = ?, url = ?, fingerprint = ?, last_seen = ?,"
+                        " updated = ? WHERE job_id = ?",
+                        (job.source, job.title, job.company, job.location, job.description,
+                         job.description, json.dumps(job.tags), json.dumps(job.sources), job.url, fp, now, now,
+                         job.job_id),
+                    )
+                    changed.add(job.job_id)
+                else:
+                    # Sources are not part of the fingerprint: a new cross-post doesn't need re-embedding
+                    self._conn.execute(
+                        "UPDATE jobs SET last_seen = ?, sources = ? WHERE job_id = ?",
+                        (now, json.dumps(job.sources), job.job_id),
+                    )
+                    job = job.model_copy(update={"description": row[1]})
+                out.append(job)
+            self._conn.commit()
+        return out, changed
+
+    def save_descriptions(self, jobs: Iterable[Job]):
+        """Persist enriched descriptions (the source fingerprint is left as is)"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE jobs SET description = ?, updated = ? WHERE job_id = ? AND description != ?",
+                [(j.description, now, j.job_id, j.description) for j in jobs],
+            )
+            self._conn.commit()
+
+    def save_sources(self, jobs: Iterable[Job]):
+        """Persist the sources lists of stored jobs (cross-posts merged in after sync)"""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE jobs SET sources = ? WHERE job_id = ?",
+                [(json.dumps(j.sources), j.job_id) for j in jobs],
+            )
+            self._conn.commit()
+
+    def load(self, sources: Optional[List[str]] = None, max_age: Optional[float] = None) -> List[Job]:
+        """
+        Stored jobs, most recently seen first
+
+        Args:
+            sources: Only jobs seen on these sources, as source or in sources (None = all)
+            max_age: Only jobs seen within this many seconds (None = any)
+        """
+        query = "SELECT job_id, source, title, company, location, description, tags, url, sources FROM jobs WHERE 1=1"
+        params = []
+        if sources:
+            # A canonical posting also counts for the boards its cross-posts came from
+            marks = ",".join("?" * len(sources))
+            query += (f" AND (source IN ({marks})"
+                      f" OR EXISTS (SELECT 1 FROM json_each(jobs.sources) WHERE value IN ({marks})))")
+            params.extend(sources)
+            params.extend(sources)
+        if max_age is not None:
+            query += " AND last_seen >= ?"
+            params.append(time.time() - max_age)
+        query += " ORDER BY last_seen DESC"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._row_to_job(r) for r in rows]
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_job_store() -> Optional[JobStore]:
+    """Shared store instance, or None when USE_JOB_STORE=false"""
+    global _store
+    if not config.USE_JOB_STORE:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = JobStore()
+        return _store
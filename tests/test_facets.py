@@ -0,0 +1,78 @@
+"""Facet bitset persistence: deltas, full rewrites and in-place updates"""
+import numpy as np
+
+from rag import facets
+from rag.facets import FacetIndex
+from rag.schemas import Job
+
+FILTERS = [
+    {"location": "remote"},
+    {"source": ["a", "c"]},
+    {"tag": "t3", "location": "us"},
+    {"location": "united kingdom"},
+]
+
+
+def make_jobs(n):
+    locations = ["Remote", "Berlin", "Remote - US", "London, UK"]
+    return [
+        Job(job_id=f"j{i}", title="t", company="c", location=locations[i % 4], description="",
+            tags=[f"t{i % 7}"], url="", source="ABC"[i % 3])
+        for i in range(n)
+    ]
+
+
+def assert_same_rows(index, jobs):
+    fresh = FacetIndex()
+    fresh.add(jobs)
+    assert len(index) == len(fresh)
+    for f in FILTERS:
+        np.testing.assert_array_equal(index.mask(index.filter(f)), fresh.mask(fresh.filter(f)))
+    for facet in facets.FACETS:
+        assert index.values(facet) == fresh.values(facet)
+
+
+def save_in_batches(path, jobs, batch, reload_every=3):
+    index = FacetIndex()
+    for n, i in enumerate(range(0, len(jobs), batch)):
+        if n and n % reload_every == 0:
+            index = FacetIndex.load(path)
+        index.add(jobs[i:i + batch])
+        index.save(path)
+    return index
+
+
+def test_deltas(tmp_path):
+    path = tmp_path / "facets.npz"
+    jobs = make_jobs(37)
+    save_in_batches(path, jobs, batch=5)
+
+    assert len(FacetIndex._delta_paths(path)) == 7
+    assert_same_rows(FacetIndex.load(path), jobs)
+
+
+def test_full_rewrite_past_max_deltas(tmp_path, monkeypatch):
+    monkeypatch.setattr(facets, "MAX_DELTAS", 2)
+    path = tmp_path / "facets.npz"
+    jobs = make_jobs(53)
+    save_in_batches(path, jobs, batch=5)
+
+    assert len(FacetIndex._delta_paths(path)) <= 2
+    assert_same_rows(FacetIndex.load(path), jobs)
+
+
+def test_stale_deltas_are_skipped(tmp_path):
+    path = tmp_path / "facets.npz"
+    jobs = make_jobs(20)
+    index = save_in_batches(path, jobs[:10], batch=5)
+    stale = {p.name: p.read_bytes() for p in FacetIndex._delta_paths(path)}
+
+    index.update(3, jobs[3].model_copy(update={"sources": ["Z"]}))
+    index.save(path)  # full rewrite after update()
+    for name, data in stale.items():
+        (tmp_path / name).write_bytes(data)
+
+    jobs[3] = jobs[3].model_copy(update={"sources": ["Z"]})
+    loaded = FacetIndex.load(path)
+    assert_same_rows(loaded, jobs[:10])
+    assert np.flatnonzero(loaded.mask(loaded.filter({"source": "z"}))).tolist() == [3]
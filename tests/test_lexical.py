@@ -0,0 +1,130 @@
+"""BM25 persistence: deltas, merges and rebuilds against JobIndex segments"""
+import random
+import shutil
+
+import numpy as np
+import pytest
+
+from rag import lexical
+from rag.index import LEXICAL_FILE, JobIndex
+from rag.lexical import BM25Index, document_text
+from rag.schemas import Job
+
+QUERIES = ["w1 w2", "w17 w2999 w5", "w400", "the and", "unknown"]
+
+
+def make_texts(n, seed=0, words=50):
+    rng = random.Random(seed)
+    vocab = [f"w{i}" for i in range(3000)]
+    return [" ".join(rng.choice(vocab) for _ in range(words)) for _ in range(n)]
+
+
+def assert_same_scores(index, texts):
+    fresh = BM25Index()
+    fresh.add(texts)
+    assert len(index) == len(fresh)
+    for q in QUERIES:
+        np.testing.assert_allclose(index.scores(q), fresh.scores(q), rtol=1e-6)
+
+
+def save_in_batches(path, texts, batch, reload_every=3):
+    index = BM25Index()
+    for n, i in enumerate(range(0, len(texts), batch)):
+        if n and n % reload_every == 0:
+            index = BM25Index.load(path)
+        index.add(texts[i:i + batch])
+        index.save(path)
+    return index
+
+
+def test_deltas_without_merge(tmp_path):
+    path = tmp_path / "lexical.npz"
+    texts = make_texts(30)
+    index = save_in_batches(path, texts, batch=5)
+
+    assert index._merged_rows == 0
+    assert len(BM25Index._delta_paths(path)) == 6
+    assert_same_scores(BM25Index.load(path), texts)
+
+
+def test_deltas_merge_past_max_deltas(tmp_path, monkeypatch):
+    monkeypatch.setattr(lexical, "MAX_DELTAS", 3)
+    path = tmp_path / "lexical.npz"
+    texts = make_texts(60)
+    index = save_in_batches(path, texts, batch=5)
+
+    assert index._merged_rows > 0
+    assert len(BM25Index._delta_paths(path)) <= 3
+    assert_same_scores(BM25Index.load(path), texts)
+
+
+def test_merge_by_size(tmp_path):
+    path = tmp_path / "lexical.npz"
+    texts = make_texts(800, words=120)
+    index = save_in_batches(path, texts, batch=200, reload_every=2)
+
+    assert index._merged_rows > 0
+    assert_same_scores(BM25Index.load(path), texts)
+
+
+def test_stale_deltas_are_skipped(tmp_path, monkeypatch):
+    monkeypatch.setattr(lexical, "MAX_DELTAS", 2)
+    path = tmp_path / "lexical.npz"
+    texts = make_texts(20)
+    index = save_in_batches(path, texts[:10], batch=5)
+    stale = {p.name: p.read_bytes() for p in BM25Index._delta_paths(path)}
+    assert stale
+
+    index.add(texts[10:20])
+    index.save(path)  # merges and removes the old deltas
+    for name, data in stale.items():
+        (tmp_path / name).write_bytes(data)  # as if the removal had been interrupted
+
+    assert_same_scores(BM25Index.load(path), texts)
+
+
+def make_jobs(n):
+    texts = make_texts(n, seed=1, words=20)
+    return [
+        Job(job_id=f"j{i}", title=f"title{i}", company="acme", location="Remote",
+            description=text, tags=[], url="", source="Test")
+        for i, text in enumerate(texts)
+    ]
+
+
+@pytest.fixture
+def segmented_index(tmp_path):
+    """JobIndex of three segments whose lexical index has been saved"""
+    path = tmp_path / "index"
+    jobs = make_jobs(30)
+    vectors = np.random.default_rng(0).standard_normal((30, 8)).astype("float32")
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    index = JobIndex(path, mode="hybrid")
+    for i in range(0, 30, 10):
+        index.add(vectors[i:i + 10], jobs[i:i + 10])
+    index.search(vectors[0], 3, query_text="w1")
+    assert (path / LEXICAL_FILE).exists()
+    return path, vectors
+
+
+def test_lexical_reload_matches_segments(segmented_index):
+    path, vectors = segmented_index
+    index = JobIndex(path, mode="hybrid")
+    lex = index._lexical_index()
+    assert_same_scores(lex, [document_text(job) for job in index.meta])
+
+
+def test_lexical_rebuilt_when_segment_is_lost(segmented_index, capsys):
+    path, vectors = segmented_index
+    (path / "seg-000002.npy").write_bytes(b"not a segment")
+
+    index = JobIndex(path, mode="hybrid")
+    assert len(index.meta) == 20
+    lex = index._lexical_index()
+    assert "does not match the index segments" in capsys.readouterr().out
+    assert_same_scores(lex, [document_text(job) for job in index.meta])
+
+    # The rebuilt file now matches and is used as is
+    index = JobIndex(path, mode="hybrid")
+    index._lexical_index()
+    assert "does not match" not in capsys.readouterr().out
@@ -0,0 +1,176 @@
+"""
+Streaming visible-text extraction from HTML
+
+VisibleTextParser is fed the page a chunk at a time and keeps only the
+visible text, whitespace-collapsed, stopping once max_chars are collected.
+It reproduces what BeautifulSoup(html, "html.parser") followed by
+decomposing script/style/noscript and get_text(" ") gives, without
+building a tree: the same stdlib tokenizer, the same entity handling and
+the same rules for which strings count as text.
+"""
+import codecs
+from html.entities import html5
+from html.parser import HTMLParser
+
+# Content dropped entirely (fetch_job_description used to decompose these)
+SKIP_TAGS = {"script", "style", "noscript"}
+# Strings directly under these are not "text" to get_text(); CDATA still is
+HIDDEN_STRING_TAGS = {"rt", "rp", "template"}
+# Never stay open, whether or not the page closes them
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link",
+    "menuitem", "meta", "param", "source", "track", "wbr", "basefont", "bgsound",
+    "command", "frame", "image", "isindex", "nextid", "spacer",
+}
+
+_ENTITIES = {name[:-1]: char for name, char in html5.items() if name.endswith(";")}
+
+
+class VisibleTextParser(HTMLParser):
+    """
+    Incremental visible-text collector
+
+    Call feed() with str chunks until done is True or the input ends, then
+    close() and read text().
+    """
+
+    def __init__(self, max_chars=6000):
+        super().__init__(convert_charrefs=False)
+        self.max_chars = max_chars
+        self.done = False
+        self._words = []
+        self._length = -1  # length of " ".join(self._words)
+        self._pending = []
+        self._stack = []
+        self._closed_void = []
+        self._skip = 0
+        self._hidden = 0
+
+    # Text nodes -----------------------------------------------------------
+
+    def _flush(self, cdata=False):
+        if not self._pending:
+            return
+        data = "".join(self._pending)
+        self._pending = []
+        if self._skip or self.done or (self._hidden and not cdata):
+            return
+        for word in data.split():
+            self._words.append(word)
+            self._length += len(word) + 1
+            if self._length >= self.max_chars:
+                self.done = True
+                return
+
+    def handle_data(self, data):
+        self._pending.append(data)
+
+    def handle_charref(self, name):
+        if name[0] in "xX":
+            code = int(name[1:], 16)
+        else:
+            code = int(name)
+        data = None
+        if code < 256:
+            # Pages often mean windows-1252 when they write &#147; and friends
+            try:
+                data = bytes([code]).decode("windows-1252")
+            except UnicodeDecodeError:
+                pass
+        if not data:
+            try:
+                data = chr(code)
+            except (ValueError, OverflowError):
+                pass
+        self.handle_data(data or "\N{REPLACEMENT CHARACTER}")
+
+    def handle_entityref(self, name):
+        # Unknown entities are kept as the literal "&name"
+        self.handle_data(_ENTITIES.get(name, "&" + name))
+
+    # Markup ---------------------------------------------------------------
+
+    def _open(self, tag):
+        self._stack.append(tag)
+        self._skip += tag in SKIP_TAGS
+        self._hidden += tag in HIDDEN_STRING_TAGS
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag in VOID_TAGS:
+            self._closed_void.append(tag)
+            return
+        self._open(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        # "<x/>" opens x and then closes it as if "</x>" followed
+        self._flush()
+        self._open(tag)
+        self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in self._closed_void:
+            # "<br>...</br>": the end tag of an already closed void element is dropped unseen
+            self._closed_void.remove(tag)
+            return
+        self._flush()
+        if tag not in self._stack:
+            return  # stray end tag, ignored like a tree builder would
+        while self._stack:
+            name = self._stack.pop()
+            self._skip -= name in SKIP_TAGS
+            self._hidden -= name in HIDDEN_STRING_TAGS
+            if name == tag:
+                break
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    def unknown_decl(self, data):
+        self._flush()
+        if data.upper().startswith("CDATA["):
+            self._pending.append(data[len("CDATA["):])
+            self._flush(cdata=True)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+    def text(self):
+        return " ".join(self._words)[:self.max_chars]
+
+
+def visible_text(chunks, max_chars=6000, encoding="utf-8"):
+    """
+    Visible, whitespace-collapsed text of an HTML document given in chunks
+
+    Args:
+        chunks: Iterable of str or bytes pieces of the page
+        max_chars: Stop reading once this much text is collected
+        encoding: Used to decode bytes chunks (undecodable bytes are replaced)
+
+    Returns:
+        At most max_chars characters of text
+    """
+    parser = VisibleTextParser(max_chars)
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    for chunk in chunks:
+        if isinstance(chunk, bytes):
+            chunk = decoder.decode(chunk)
+        parser.feed(chunk)
+        if parser.done:
+            return parser.text()
+    parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+    return parser.text()
+
+
+def page_text(page, max_chars=6000, encoding="utf-8"):
+    """visible_text() of a whole downloaded page; picklable entry point for parse workers"""
+    return visible_text([page], max_chars=max_chars, encoding=encoding)
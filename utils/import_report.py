@@ -0,0 +1,67 @@
+"""
+Import-time report
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter and
+prints the total plus the slowest modules (cumulative time), so heavy imports
+that sneak back onto the startup path are easy to spot.
+
+Usage:
+    python -m utils.import_report main
+    python -m utils.import_report agents.graph --top 15
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def import_times(module: str):
+    """
+    Import a module in a fresh interpreter and collect -X importtime output
+
+    Args:
+        module: Dotted module name to import
+
+    Returns:
+        List of (cumulative_us, self_us, name) tuples, one per imported module
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else f"import {module} failed")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Show where import time goes")
+    ap.add_argument("module", nargs="?", default="main")
+    ap.add_argument("--top", type=int, default=10)
+    args = ap.parse_args()
+
+    rows = import_times(args.module)
+    # The requested module is the last top-level entry
+    total = next((c for c, _, name in reversed(rows) if name.strip() == args.module), None)
+    if total is None:
+        total = sum(c for c, _, name in rows if not name.startswith(" "))
+
+    print(f"import {args.module}: {total / 1e6:.2f}s ({len(rows)} modules)")
+    print(f"{'cumulative':>11} {'self':>9}  module")
+    for cumulative, self_time, name in sorted(rows, reverse=True)[:args.top]:
+        print(f"{cumulative / 1e6:>10.3f}s {self_time / 1e6:>8.3f}s  {name.strip()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,225 @@
 """
 LLM helper that works with both local Ollama and cloud APIs (Groq)
+
+All calls share one pooled requests.Session and retry 429/5xx responses
+and connection errors with exponential backoff.
 """
+import hashlib
+import json
+import random
+import threading
+import time
+from typing import Iterator
+
 import requests
+from requests.adapters import HTTPAdapter
+
 import config
+from storage.cache import llm_cache
+
+ERROR_PREFIX = "Error calling LLM"
+GROQ_URL = "https://api.groq.com/openai/v1/chat/completions"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    """Shared keep-alive session, so repeat calls reuse the TLS connection"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=config.LLM_POOL_SIZE)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def _backoff(attempt: int, response=None) -> float:
+    """Honour a numeric Retry-After, else exponential backoff with jitter"""
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), config.LLM_RETRY_MAX_DELAY)
+        except ValueError:
+            pass
+    delay = config.LLM_RETRY_BACKOFF * (2 ** attempt)
+    return min(delay + random.uniform(0, delay / 4), config.LLM_RETRY_MAX_DELAY)
+
+
+def _post(url: str, payload: dict, headers=None, timeout=30, stream=False) -> requests.Response:
+    """POST with bounded retries on 429/5xx and connection errors"""
+    session = _get_session()
+    for attempt in range(config.LLM_MAX_RETRIES + 1):
+        last_try = attempt == config.LLM_MAX_RETRIES
+        try:
+            response = session.post(url, json=payload, headers=headers, timeout=timeout, stream=stream)
+        except (requests.ConnectionError, requests.Timeout):
+            if last_try:
+                raise
+            time.sleep(_backoff(attempt))
+            continue
+
+        if response.status_code in RETRY_STATUSES and not last_try:
+            response.close()
+            time.sleep(_backoff(attempt, response))
+            continue
+
+        response.raise_for_status()
+        return response
+
+
+def _provider():
+    if config.USE_CLOUD_LLM and config.GROQ_API_KEY:
+        return "groq", config.LLM_MODEL
+    return "ollama", config.OLLAMA_MODEL
+
+
+def _cache_key(provider: str, model: str, max_tokens: int, prompt: str) -> str:
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    return json.dumps([provider, model, max_tokens, config.LLM_TEMPERATURE, prompt_hash])
+
 
 def call_llm(prompt: str, max_tokens: int = 1000) -> str:
     """
     Call LLM with automatic fallback between Groq (cloud) and Ollama (local)
+
+    Successful completions are cached on disk (see storage.cache.llm_cache),
+    so re-running the same prompt skips the API call.
     """
-    if config.USE_CLOUD_LLM and config.GROQ_API_KEY:
-        return _call_groq(prompt, max_tokens)
-    else:
-        return _call_ollama(prompt, max_tokens)
+    provider, model = _provider()
+    call = _call_groq if provider == "groq" else _call_ollama
 
+    cache = llm_cache()
+    key = _cache_key(provider, model, max_tokens, prompt)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
 
-def _call_groq(prompt: str, max_tokens: int) -> str:
-    """Call Groq API (free, fast cloud LLM)"""
+    response = call(prompt, max_tokens)
+
+    # Never cache failures; they should be retried next time
+    if cache is not None and response and not response.startswith(ERROR_PREFIX):
+        cache.set(key, response)
+    return response
+
+
+def stream_llm(prompt: str, max_tokens: int = 1000) -> Iterator[str]:
+    """
+    Like call_llm, but yields the completion piece by piece as it arrives
+
+    A cached completion is yielded in one piece. On failure before any
+    text arrived, a single "Error calling LLM: ..." string is yielded.
+    """
+    provider, model = _provider()
+    stream = _stream_groq if provider == "groq" else _stream_ollama
+
+    cache = llm_cache()
+    key = _cache_key(provider, model, max_tokens, prompt)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+    parts = []
     try:
-        response = requests.post(
-            "https://api.groq.com/openai/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {config.GROQ_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": config.LLM_MODEL,
-                "messages": [{"role": "user", "content": prompt}],
+        for piece in stream(prompt, max_tokens):
+            parts.append(piece)
+            yield piece
+    except Exception as e:
+        print(f"{provider} streaming error: {e}")
+        if not parts:
+            yield f"{ERROR_PREFIX}: {str(e)}"
+        return
+
+    text = "".join(parts)
+    if cache is not None and text:
+        cache.set(key, text)
+
+
+def _groq_request(prompt: str, max_tokens: int, stream: bool) -> requests.Response:
+    return _post(
+        GROQ_URL,
+        {
+            "model": config.LLM_MODEL,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": config.LLM_TEMPERATURE,
+            "max_tokens": max_tokens,
+            "stream": stream,
+        },
+        headers={
+            "Authorization": f"Bearer {config.GROQ_API_KEY}",
+            "Content-Type": "application/json"
+        },
+        timeout=30,
+        stream=stream,
+    )
+
+
+def _ollama_request(prompt: str, max_tokens: int, stream: bool) -> requests.Response:
+    return _post(
+        f"{config.OLLAMA_BASE_URL}/api/chat",
+        {
+            "model": config.OLLAMA_MODEL,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": stream,
+            "options": {
+                "num_predict": max_tokens,
                 "temperature": config.LLM_TEMPERATURE,
-                "max_tokens": max_tokens
             },
-            timeout=30
-        )
-        response.raise_for_status()
+        },
+        timeout=60,
+        stream=stream,
+    )
+
+
+def _call_groq(prompt: str, max_tokens: int) -> str:
+    """Call Groq API (free, fast cloud LLM)"""
+    try:
+        response = _groq_request(prompt, max_tokens, stream=False)
         return response.json()["choices"][0]["message"]["content"]
     except Exception as e:
         print(f"Groq API error: {e}")
-        return f"Error calling LLM: {str(e)}"
+        return f"{ERROR_PREFIX}: {str(e)}"
 
 
 def _call_ollama(prompt: str, max_tokens: int) -> str:
     """Call local Ollama API"""
     try:
-        response = requests.post(
-            f"{config.OLLAMA_BASE_URL}/api/chat",
-            json={
-                "model": config.OLLAMA_MODEL,
-                "messages": [{"role": "user", "content": prompt}],
-                "stream": False
-            },
-            timeout=60
-        )
-        response.raise_for_status()
+        response = _ollama_request(prompt, max_tokens, stream=False)
         return response.json()["message"]["content"]
     except Exception as e:
         print(f"Ollama error: {e}")
-        return f"Error calling LLM: {str(e)}"
\ No newline at end of file
+        return f"{ERROR_PREFIX}: {str(e)}"
+
+
+def _stream_groq(prompt: str, max_tokens: int) -> Iterator[str]:
+    """Groq streams OpenAI-style server-sent events"""
+    with _groq_request(prompt, max_tokens, stream=True) as response:
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+            if delta:
+                yield delta
+
+
+def _stream_ollama(prompt: str, max_tokens: int) -> Iterator[str]:
+    """Ollama streams one JSON object per line"""
+    with _ollama_request(prompt, max_tokens, stream=True) as response:
+        for line in response.iter_lines(decode_unicode=True):
+            if not line:
+                continue
+            chunk = json.loads(line)
+            piece = chunk.get("message", {}).get("content")
+            if piece:
+                yield piece
+            if chunk.get("done"):
+                break
@@ -2,6 +2,15 @@ import logging
 import sys
 from pathlib import Path
 
+
+class _LazyFileHandler(logging.FileHandler):
+    """FileHandler that creates its directory on the first record, not at import"""
+
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
 def setup_logger(name: str, log_file: str = None, level=logging.INFO):
     """Setup logger with both file and console handlers"""
     logger = logging.getLogger(name)
@@ -24,8 +33,7 @@ def setup_logger(name: str, log_file: str = None, level=logging.INFO):
     # File handler (optional)
     if log_file:
         log_path = Path("logs")
-        log_path.mkdir(exist_ok=True)
-        file_handler = logging.FileHandler(log_path / log_file)
+        file_handler = _LazyFileHandler(log_path / log_file, delay=True)
         file_handler.setFormatter(formatter)
         logger.addHandler(file_handler)
     
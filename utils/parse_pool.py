@@ -0,0 +1,110 @@
+"""
+Process pool for CPU-bound HTML parsing
+
+HTML parsing is pure Python and holds the GIL, so fetching pages on many
+threads still parses them one at a time. run_parse() and map_parse() send
+the raw page to one of PARSE_WORKERS worker processes and get only the
+extracted result back. With PARSE_WORKERS=0 (the default), for payloads
+under PARSE_MIN_BYTES, or if the pool cannot be used, parsing runs serially
+in the calling thread instead.
+
+Functions given to the pool must be importable top-level functions, and
+their arguments and results must be picklable.
+"""
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pickle import PicklingError
+
+import config
+
+# Failures of the pool itself, as opposed to errors raised by the parse function
+POOL_ERRORS = (BrokenProcessPool, PicklingError)
+
+_pool = None
+_pool_workers = 0
+_disabled = False
+_lock = threading.Lock()
+
+
+def _get_pool(workers):
+    global _pool, _pool_workers
+    with _lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            # spawn, not fork: the parent runs fetch threads, which fork does not copy safely
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown():
+    """Stop the worker processes (they are started again on demand)"""
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(shutdown)
+
+
+def _use_pool(size, workers):
+    return workers > 0 and not _disabled and size >= config.PARSE_MIN_BYTES
+
+
+def _pool_failed(e):
+    global _disabled
+    if not _disabled:
+        print(f"Warning: parse pool unavailable ({e}); parsing serially")
+    _disabled = True
+
+
+def run_parse(fn, *args, size=None, workers=None):
+    """
+    Call fn(*args) in a parse worker, or inline when the pool is off
+
+    Args:
+        fn: Top-level parse function
+        *args: Its arguments, usually the page text or bytes first
+        size: Payload size in bytes/chars; defaults to len(args[0])
+        workers: Pool size (defaults to config.PARSE_WORKERS)
+
+    Returns:
+        Whatever fn returns
+    """
+    workers = config.PARSE_WORKERS if workers is None else workers
+    size = len(args[0]) if size is None and args else (size or 0)
+    if _use_pool(size, workers):
+        try:
+            future = _get_pool(workers).submit(fn, *args)
+        except Exception as e:
+            _pool_failed(e)
+        else:
+            try:
+                return future.result()
+            except POOL_ERRORS as e:
+                _pool_failed(e)
+    return fn(*args)
+
+
+def map_parse(fn, items, workers=None, chunksize=16):
+    """
+    [fn(item) for item in items], spread over the parse workers
+
+    Falls back to a serial loop when the pool is off or the items together
+    are smaller than PARSE_MIN_BYTES.
+    """
+    items = list(items)
+    workers = config.PARSE_WORKERS if workers is None else workers
+    size = sum(len(item) for item in items if hasattr(item, "__len__"))
+    if len(items) > 1 and _use_pool(size, workers):
+        try:
+            return list(_get_pool(workers).map(fn, items, chunksize=chunksize))
+        except POOL_ERRORS as e:
+            _pool_failed(e)
+    return [fn(item) for item in items]
@@ -1,7 +1,54 @@
+import html
+import re
+
 from bs4 import BeautifulSoup
 
+from utils.parse_pool import map_parse
+
+_TAG_RE = re.compile(r"<[a-zA-Z/!][^>]*>")
+_SPACE_RE = re.compile(r"\s+")
+
+
 def clean_html(html: str) -> str:
     if not html:
         return ""
     soup = BeautifulSoup(html, "html.parser")
     return soup.get_text(separator="\n").strip()
+
+
+def strip_html(text: str) -> str:
+    """
+    Plain, single-spaced text from a description that may or may not be HTML
+
+    Only text that actually contains tags goes through the HTML parser.
+    """
+    if not text:
+        return ""
+    if _TAG_RE.search(text):
+        text = clean_html(text)
+    else:
+        text = html.unescape(text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def strip_html_many(texts) -> list:
+    """strip_html() over many descriptions, in the parse workers when enabled"""
+    return map_parse(strip_html, texts)
+
+
+def job_text(job, description=None) -> str:
+    """
+    Canonical text a job is embedded from: title, company, location, tags
+    and the HTML-free description (pass description if already stripped).
+    """
+    if description is None:
+        description = strip_html(getattr(job, "description", "") or "")
+    tags = ", ".join(getattr(job, "tags", None) or [])
+    parts = [
+        getattr(job, "title", "") or "",
+        getattr(job, "company", "") or "",
+        getattr(job, "location", "") or "",
+        tags,
+        description,
+    ]
+    return "\n".join(p.strip() for p in parts if p and p.strip())